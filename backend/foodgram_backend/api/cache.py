@@ -0,0 +1,156 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from api.metrics import measure
+
+REFERENCE_CACHE_PREFIX = 'reference'
+
+
+def get_version(namespace):
+    return cache.get_or_set(
+        f'{REFERENCE_CACHE_PREFIX}:{namespace}:version',
+        time.time,
+        settings.REFERENCE_CACHE_TIMEOUT,
+    )
+
+
+def bump_version(namespace):
+    cache.set(
+        f'{REFERENCE_CACHE_PREFIX}:{namespace}:version',
+        time.time(),
+        settings.REFERENCE_CACHE_TIMEOUT,
+    )
+
+
+def invalidate(namespace):
+    transaction.on_commit(partial(bump_version, namespace))
+
+
+class SharedCacheCommandMixin:
+
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        parser.add_argument(
+            '--allow-local-cache', action='store_true',
+            help='Разрешить запуск с LocMemCache: сброс кэша не дойдёт '
+                 'до работающих процессов сервера.',
+        )
+        return parser
+
+    def execute(self, *args, **options):
+        if (
+            isinstance(caches['default'], LocMemCache)
+            and not options.get('allow_local_cache')
+            and not options.get('dry_run')
+        ):
+            raise CommandError(
+                'Кэш по умолчанию — LocMemCache, он виден только текущему '
+                'процессу, и сброс версий из команды не дойдёт до воркеров '
+                'gunicorn. Укажите общий CACHE_BACKEND (Redis, Memcached, '
+                'DatabaseCache) или передайте --allow-local-cache.'
+            )
+        return super().execute(*args, **options)
+
+
+def get_user_namespace(user_id):
+    return f'recipes:user:{user_id}'
+
+
+def build_response(request, entry):
+    content, content_type, etag, last_modified = entry
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ReferenceCacheMixin:
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cache_versions(self, request):
+        return [get_version(self.cache_namespace)]
+
+    def get_cache_identity(self, request):
+        return ''
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+        versions = self.get_cache_versions(request)
+        path_hash = hashlib.sha1(
+            request.build_absolute_uri().encode()
+        ).hexdigest()
+        key = (
+            f'{REFERENCE_CACHE_PREFIX}:{self.cache_namespace}:'
+            f'{"-".join(map(str, versions))}:'
+            f'{self.get_cache_identity(request)}:{path_hash}'
+        )
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            with measure('render'):
+                content = renderer.render(
+                    response.data,
+                    request.accepted_media_type,
+                    self.get_renderer_context(),
+                )
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f'{content_type}; charset={renderer.charset}'
+            entry = (
+                content,
+                content_type,
+                quote_etag(hashlib.sha1(content).hexdigest()),
+                int(max(versions)),
+            )
+            cache.set(key, entry, settings.REFERENCE_CACHE_TIMEOUT)
+        return build_response(request, entry)
+
+
+class RecipeCacheMixin(ReferenceCacheMixin):
+    cache_namespace = 'recipes'
+
+    def get_cache_versions(self, request):
+        versions = super().get_cache_versions(request)
+        if request.user.is_authenticated:
+            versions.append(get_version(get_user_namespace(request.user.id)))
+        return versions
+
+    def get_cache_identity(self, request):
+        if request.user.is_authenticated:
+            return request.user.id
+        return 'anon'
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        response = super().get_cached_response(
+            handler, request, *args, **kwargs
+        )
+        patch_vary_headers(response, ['Authorization'])
+        return response
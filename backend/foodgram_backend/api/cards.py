@@ -0,0 +1,138 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Prefetch
+from foodgram_backend.constants import RECIPE_CARD_BATCH_SIZE
+
+from api.cache import invalidate
+from api.serializers import (RecipeSerializer, UserSerializer,
+                             get_subscribed_ids)
+from recipes.models import Recipe, RecipeIngredient
+
+VIEWER_FIELDS = ('is_favorited', 'is_in_shopping_cart')
+URL_FIELDS = ('image', 'avatar')
+VARIANT_FIELDS = ('image_variants', 'avatar_variants')
+CARD_SOURCES = {
+    'recipes.recipe': 'pk',
+    'recipes.tag': 'tags',
+    'recipes.ingredient': 'ingredients',
+    'users.user': 'author',
+}
+
+pending = threading.local()
+
+
+def build_card(recipe):
+    card = dict(RecipeSerializer(recipe, context={}).data)
+    for field in VIEWER_FIELDS:
+        del card[field]
+    card['author'] = dict(card['author'])
+    del card['author']['is_subscribed']
+    return card
+
+
+def load_card_recipes(queryset):
+    return queryset.select_related('author').prefetch_related(
+        'tags',
+        Prefetch(
+            'ingredient_list',
+            queryset=RecipeIngredient.objects.select_related('ingredient'),
+        ),
+    )
+
+
+def save_cards(recipes):
+    for recipe in recipes:
+        recipe.card = build_card(recipe)
+    Recipe.objects.bulk_update(
+        recipes, ['card'], batch_size=RECIPE_CARD_BATCH_SIZE
+    )
+
+
+def refresh_cards(queryset):
+    recipe_ids = list(queryset.values_list('pk', flat=True))
+    for offset in range(0, len(recipe_ids), RECIPE_CARD_BATCH_SIZE):
+        save_cards(list(load_card_recipes(Recipe.objects.filter(
+            pk__in=recipe_ids[offset:offset + RECIPE_CARD_BATCH_SIZE]
+        ))))
+    return len(recipe_ids)
+
+
+def clear_cards(queryset):
+    queryset.update(card=None)
+
+
+def clear_cards_for(model, pk):
+    clear_cards(Recipe.objects.filter(
+        **{CARD_SOURCES[model._meta.label_lower]: pk}
+    ))
+
+
+def flush_card_updates():
+    recipe_ids = getattr(pending, 'card_recipe_ids', None)
+    if not recipe_ids:
+        return
+    pending.card_recipe_ids = set()
+    refresh_cards(Recipe.objects.filter(pk__in=recipe_ids))
+    invalidate('recipes')
+
+
+def schedule_card_update(recipe_ids):
+    if not hasattr(pending, 'card_recipe_ids'):
+        pending.card_recipe_ids = set()
+    pending.card_recipe_ids.update(recipe_ids)
+    transaction.on_commit(flush_card_updates)
+
+
+def absolute_urls(request, field, value):
+    if value is None or request is None:
+        return value
+    if field in URL_FIELDS:
+        return request.build_absolute_uri(value)
+    if field in VARIANT_FIELDS:
+        return {
+            variant: {
+                extension: request.build_absolute_uri(url)
+                for extension, url in files.items()
+            }
+            for variant, files in value.items()
+        }
+    return value
+
+
+def render_card(recipe, request, subscribed_ids):
+    card = recipe.card
+    author = {
+        field: (
+            card['author']['id'] in subscribed_ids
+            if field == 'is_subscribed'
+            else absolute_urls(request, field, card['author'][field])
+        )
+        for field in UserSerializer.Meta.fields
+    }
+    data = {}
+    for field in RecipeSerializer.Meta.fields:
+        if field == 'author':
+            data[field] = author
+        elif field in VIEWER_FIELDS:
+            data[field] = getattr(recipe, field, False)
+        else:
+            data[field] = absolute_urls(request, field, card[field])
+    if hasattr(recipe, 'search_headline'):
+        data['search_headline'] = recipe.search_headline
+    return data
+
+
+def render_cards(recipes, context):
+    missing = [recipe.pk for recipe in recipes if recipe.card is None]
+    if missing:
+        fresh = list(load_card_recipes(Recipe.objects.filter(pk__in=missing)))
+        save_cards(fresh)
+        cards = {recipe.pk: recipe.card for recipe in fresh}
+        for recipe in recipes:
+            if recipe.card is None:
+                recipe.card = cards.get(recipe.pk)
+        recipes = [recipe for recipe in recipes if recipe.card is not None]
+    request = context.get('request')
+    subscribed_ids = get_subscribed_ids(context)
+    return [render_card(recipe, request, subscribed_ids) for recipe in recipes]
@@ -1,15 +1,18 @@
+from django.contrib.postgres.search import (SearchHeadline, SearchQuery,
+                                            SearchRank)
+from django.db.models import Exists, F, OuterRef
 from django_filters import rest_framework as filter
-from rest_framework.filters import SearchFilter
+from foodgram_backend.constants import SEARCH_CONFIG
 
-from recipes.models import Recipe, Tag
+from recipes.models import Recipe, RecipeTag, Tag
 
 
 class RecipeFilter(filter.FilterSet):
     tags = filter.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
         queryset=Tag.objects.all(),
         label='Tags',
-        to_field_name='slug'
+        to_field_name='slug',
+        method='get_tags',
     )
     is_favorited = filter.BooleanFilter(
         method='get_favorite'
@@ -17,6 +20,9 @@ class RecipeFilter(filter.FilterSet):
     is_in_shopping_cart = filter.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filter.CharFilter(
+        method='get_search'
+    )
 
     class Meta:
         model = Recipe
@@ -25,8 +31,17 @@ class RecipeFilter(filter.FilterSet):
             'author',
             'is_favorited',
             'is_in_shopping_cart',
+            'search',
         ]
 
+    def get_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(Exists(RecipeTag.objects.filter(
+            recipe=OuterRef('pk'),
+            tag__in=value,
+        )))
+
     def get_favorite(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
             return queryset.filter(favorites__user=self.request.user)
@@ -37,6 +52,13 @@ class RecipeFilter(filter.FilterSet):
             return queryset.filter(shopping_cart__user=self.request.user)
         return queryset
 
-
-class IngredientFilter(SearchFilter):
-    search_param = 'name'
+    def get_search(self, queryset, name, value):
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query),
+            search_headline=SearchHeadline(
+                'text', query, config=SEARCH_CONFIG, max_fragments=2
+            ),
+        ).order_by('-search_rank', '-pub_date')
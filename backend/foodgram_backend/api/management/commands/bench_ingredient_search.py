@@ -0,0 +1,63 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.search import get_ingredient_index
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск ингредиентов через istartswith-фильтр '
+        'и через индекс в памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, queries, search):
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return (
+            statistics.mean(timings),
+            timings[len(timings) // 2],
+            timings[int(len(timings) * 0.95)],
+        )
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError('В базе нет ингредиентов.')
+        rng = random.Random(options['seed'])
+        queries = [
+            rng.choice(names)[:rng.randint(1, 5)]
+            for _ in range(options['queries'])
+        ]
+        limit = options['limit']
+        index = get_ingredient_index()
+        results = {
+            'filter (istartswith)': self.measure(
+                queries,
+                lambda query: list(
+                    Ingredient.objects.filter(name__istartswith=query)
+                ),
+            ),
+            'index': self.measure(
+                queries, lambda query: index.search(query, limit)
+            ),
+        }
+        self.stdout.write(
+            f'{len(names)} ингредиентов, {len(queries)} запросов, мс:'
+        )
+        for name, (mean, p50, p95) in results.items():
+            self.stdout.write(
+                f'{name:<22} mean={mean:.3f} p50={p50:.3f} p95={p95:.3f}'
+            )
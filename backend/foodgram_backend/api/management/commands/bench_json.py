@@ -0,0 +1,122 @@
+import os
+
+import base64
+import statistics
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser, orjson
+from api.renderers import FastJSONRenderer
+
+
+def build_recipe_payload(image_size):
+    return {
+        'name': 'Пирог с яблоками',
+        'text': 'Смешать, выложить в форму и запекать 40 минут. ' * 10,
+        'cooking_time': 60,
+        'tags': [1, 2],
+        'ingredients': [{'id': i, 'amount': 100} for i in range(1, 16)],
+        'image': 'data:image/jpeg;base64,'
+        + base64.b64encode(os.urandom(image_size)).decode(),
+    }
+
+
+def build_feed_payload(size):
+    return {
+        'count': 1000,
+        'next': 'http://localhost/api/recipes/?page=2',
+        'previous': None,
+        'results': [
+            {
+                'id': i,
+                'tags': [
+                    {'id': tag, 'name': f'Тег {tag}', 'slug': f'tag-{tag}'}
+                    for tag in range(3)
+                ],
+                'author': {
+                    'email': f'author{i}@example.com',
+                    'id': i,
+                    'username': f'author{i}',
+                    'first_name': 'Автор',
+                    'last_name': str(i),
+                    'is_subscribed': i % 2 == 0,
+                    'avatar': None,
+                    'avatar_variants': None,
+                },
+                'ingredients': [
+                    {
+                        'id': ingredient,
+                        'name': f'Ингредиент {ingredient}',
+                        'measurement_unit': 'г',
+                        'amount': 100,
+                    }
+                    for ingredient in range(10)
+                ],
+                'is_favorited': False,
+                'is_in_shopping_cart': True,
+                'name': f'Рецепт {i}',
+                'image': f'http://localhost/media/recipes/{i}.jpg',
+                'image_variants': None,
+                'text': 'Нарезать, перемешать и запечь. ' * 20,
+                'cooking_time': 30,
+            }
+            for i in range(size)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость кодирования и разбора JSON стандартными '
+        'классами DRF и FastJSONRenderer/FastJSONParser на ленте рецептов '
+        'и на создании рецепта с изображением в base64.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--image-kb', type=int, default=2048)
+        parser.add_argument('--page-size', type=int, default=24)
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def measure(self, action, iterations):
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            action()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson не установлен: быстрые классы используют json.'
+            ))
+        payloads = (
+            ('лента', build_feed_payload(options['page_size'])),
+            (
+                'рецепт с фото',
+                build_recipe_payload(options['image_kb'] * 1024),
+            ),
+        )
+        implementations = (
+            ('DRF', JSONRenderer(), JSONParser()),
+            ('Fast', FastJSONRenderer(), FastJSONParser()),
+        )
+        for payload_name, data in payloads:
+            body = JSONRenderer().render(data)
+            megabytes = len(body) / 1024 / 1024
+            self.stdout.write(f'{payload_name}: {megabytes:.2f} МБ')
+            for name, renderer, parser in implementations:
+                encode = self.measure(
+                    lambda: renderer.render(data), options['iterations']
+                )
+                decode = self.measure(
+                    lambda: parser.parse(BytesIO(body)), options['iterations']
+                )
+                self.stdout.write(
+                    f'  {name:<5} кодирование {megabytes / encode:8.1f} МБ/с'
+                    f'  разбор {megabytes / decode:8.1f} МБ/с'
+                )
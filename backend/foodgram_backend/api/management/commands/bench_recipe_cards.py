@@ -0,0 +1,131 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.cards import refresh_cards, render_cards
+from api.serializers import RecipeSerializer, get_subscribed_ids
+from api.views import annotate_recipe_flags, build_recipe_queryset
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            RecipeTag, Tag)
+from users.models import Subscription, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает процессорное время сериализации страницы ленты через '
+        'RecipeSerializer и сборки из сохранённых карточек рецептов. '
+        'Данные создаются во временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=24)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=10)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def create_data(self, options):
+        viewer = User.objects.create(
+            username='cards_viewer', email='cards_viewer@example.com'
+        )
+        author = User.objects.create(
+            username='cards_author', email='cards_author@example.com',
+            first_name='Бенчмарк', last_name='Карточек',
+        )
+        Subscription.objects.create(user=viewer, author=author)
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'cards {i}', slug=f'cards-{i}')
+            for i in range(options['tags_per_recipe'])
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'cards {i}', measurement_unit='г')
+            for i in range(options['ingredients_per_recipe'])
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f'Рецепт {i}',
+                text='Нарезать, перемешать и запечь. ' * 20,
+                image='media/recipes/cards.jpg',
+                cooking_time=30,
+            )
+            for i in range(options['page_size'])
+        )
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag=tag)
+            for recipe in recipes
+            for tag in tags
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=100)
+            for recipe in recipes
+            for ingredient in ingredients
+        )
+        Favorite.objects.bulk_create(
+            Favorite(user=viewer, recipe=recipe) for recipe in recipes[::2]
+        )
+        recipes = Recipe.objects.filter(author=author).order_by('-id')
+        refresh_cards(recipes)
+        return viewer, recipes
+
+    def get_context(self, viewer):
+        request = Request(APIRequestFactory(SERVER_NAME='localhost').get(
+            '/api/recipes/'
+        ))
+        request.user = viewer
+        context = {'request': request}
+        get_subscribed_ids(context)
+        return context
+
+    def measure(self, render, iterations):
+        timings = []
+        for _ in range(iterations):
+            start = time.process_time()
+            JSONRenderer().render(render())
+            timings.append((time.process_time() - start) * 1000)
+        return statistics.mean(timings), statistics.median(timings)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            viewer, recipes = self.create_data(options)
+            context = self.get_context(viewer)
+            serialized = list(build_recipe_queryset(recipes, viewer))
+            carded = list(annotate_recipe_flags(
+                recipes.only('id', 'pub_date', 'card'), viewer
+            ))
+            transaction.set_rollback(True)
+
+        def render_serializer():
+            return RecipeSerializer(
+                serialized, many=True, context=dict(context)
+            ).data
+
+        def render_from_cards():
+            return render_cards(carded, dict(context))
+
+        if json.loads(JSONRenderer().render(render_serializer())) != (
+            json.loads(JSONRenderer().render(render_from_cards()))
+        ):
+            raise CommandError(
+                'Карточки расходятся с выводом RecipeSerializer.'
+            )
+        results = {}
+        for name, render in (
+            ('RecipeSerializer', render_serializer),
+            ('Карточки', render_from_cards),
+        ):
+            mean, p50 = self.measure(render, options['iterations'])
+            results[name] = mean
+            self.stdout.write(
+                f'{name:<18} mean={mean:.2f} p50={p50:.2f} мс CPU '
+                f'на страницу из {options["page_size"]} рецептов'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Ускорение: '
+            f'{results["RecipeSerializer"] / results["Карточки"]:.1f}x'
+        ))
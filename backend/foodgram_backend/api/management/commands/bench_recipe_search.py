@@ -0,0 +1,126 @@
+import random
+import statistics
+import time
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F, Q
+from foodgram_backend.constants import PER_PAGE_LIMIT, SEARCH_CONFIG
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from recipes.search import update_search_vector
+from users.models import User
+
+BATCH_SIZE = 5000
+WORDS = [
+    'суп', 'салат', 'пирог', 'запеканка', 'рагу', 'каша', 'омлет', 'соус',
+    'жарить', 'варить', 'запекать', 'тушить', 'нарезать', 'смешать',
+    'духовка', 'сковорода', 'кастрюля', 'минут', 'соль', 'перец',
+    'острый', 'сладкий', 'быстрый', 'домашний', 'праздничный', 'постный',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетический корпус рецептов во временной транзакции '
+        'и сравнивает icontains-поиск с полнотекстовым.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, queries, search):
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return (
+            statistics.mean(timings),
+            timings[len(timings) // 2],
+            timings[int(len(timings) * 0.95)],
+        )
+
+    def create_corpus(self, rng, size):
+        ingredients = list(Ingredient.objects.values_list('id', 'name'))
+        if not ingredients:
+            raise CommandError(
+                'Нужен справочник ингредиентов: python manage.py '
+                'loaddata data/fixtures.json'
+            )
+        author = User.objects.create(
+            username='search_benchmark',
+            email='search_benchmark@example.com',
+        )
+        for offset in range(0, size, BATCH_SIZE):
+            recipes = Recipe.objects.bulk_create(
+                Recipe(
+                    author=author,
+                    name=' '.join(rng.sample(WORDS, 3)),
+                    text=' '.join(rng.choices(WORDS, k=40)),
+                    image='media/recipes/benchmark.jpg',
+                    cooking_time=rng.randint(1, 180),
+                )
+                for _ in range(min(BATCH_SIZE, size - offset))
+            )
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient_id=ingredient_id,
+                    amount=rng.randint(1, 500),
+                )
+                for recipe in recipes
+                for ingredient_id, _ in rng.sample(ingredients, 5)
+            )
+        update_search_vector(Recipe.objects.filter(author=author))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE recipes_recipe')
+        return [name for _, name in ingredients]
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Полнотекстовый поиск работает на PostgreSQL.')
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            start = time.perf_counter()
+            ingredient_names = self.create_corpus(rng, options['recipes'])
+            self.stdout.write(
+                f'Корпус из {options["recipes"]} рецептов создан за '
+                f'{time.perf_counter() - start:.1f} с'
+            )
+            queries = [
+                rng.choice(WORDS + ingredient_names)
+                for _ in range(options['queries'])
+            ]
+
+            def search_icontains(value):
+                return list(Recipe.objects.filter(
+                    Q(name__icontains=value)
+                    | Q(text__icontains=value)
+                    | Q(ingredients__name__icontains=value)
+                ).distinct().order_by('-pub_date')[:PER_PAGE_LIMIT])
+
+            def search_vector(value):
+                query = SearchQuery(
+                    value, config=SEARCH_CONFIG, search_type='websearch'
+                )
+                return list(Recipe.objects.filter(
+                    search_vector=query
+                ).annotate(
+                    rank=SearchRank(F('search_vector'), query)
+                ).order_by('-rank', '-pub_date')[:PER_PAGE_LIMIT])
+
+            results = {
+                'icontains': self.measure(queries, search_icontains),
+                'search_vector': self.measure(queries, search_vector),
+            }
+            for name, (mean, p50, p95) in results.items():
+                self.stdout.write(
+                    f'{name:<14} mean={mean:.2f} p50={p50:.2f} '
+                    f'p95={p95:.2f} мс'
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,110 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from foodgram_backend.constants import PER_PAGE_LIMIT
+
+from recipes.models import Recipe, RecipeTag, Tag
+from users.models import User
+
+BATCH_SIZE = 10_000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает фильтрацию рецептов по тегам через JOIN + DISTINCT '
+        'и через EXISTS на синтетических данных во временной транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipe-tags', type=int, default=1_000_000)
+        parser.add_argument('--tags', type=int, default=20)
+        parser.add_argument('--tags-per-recipe', type=int, default=4)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--explain', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def create_data(self, rng, options):
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'benchmark {i}', slug=f'benchmark-{i}')
+            for i in range(options['tags'])
+        )
+        author = User.objects.create(
+            username='tag_benchmark',
+            email='tag_benchmark@example.com',
+        )
+        per_recipe = options['tags_per_recipe']
+        total = options['recipe_tags'] // per_recipe
+        for offset in range(0, total, BATCH_SIZE):
+            recipes = Recipe.objects.bulk_create(
+                Recipe(
+                    author=author,
+                    name='benchmark',
+                    text='benchmark',
+                    image='media/recipes/benchmark.jpg',
+                    cooking_time=1,
+                )
+                for _ in range(min(BATCH_SIZE, total - offset))
+            )
+            RecipeTag.objects.bulk_create(
+                RecipeTag(recipe=recipe, tag=tag)
+                for recipe in recipes
+                for tag in rng.sample(tags, per_recipe)
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE recipes_recipe')
+            cursor.execute('ANALYZE recipes_recipetag')
+        return tags
+
+    def join_filter(self, tags):
+        return Recipe.objects.filter(
+            tags__slug__in=[tag.slug for tag in tags]
+        ).distinct()
+
+    def exists_filter(self, tags):
+        return Recipe.objects.filter(Exists(RecipeTag.objects.filter(
+            recipe=OuterRef('pk'),
+            tag__in=tags,
+        )))
+
+    def measure(self, selections, build):
+        timings = []
+        for tags in selections:
+            start = time.perf_counter()
+            queryset = build(tags)
+            count = queryset.count()
+            list(queryset.order_by('-pub_date', '-id')[:PER_PAGE_LIMIT])
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return count, statistics.mean(timings), timings[len(timings) // 2]
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            start = time.perf_counter()
+            tags = self.create_data(rng, options)
+            self.stdout.write(
+                f'{options["recipe_tags"]} строк RecipeTag создано за '
+                f'{time.perf_counter() - start:.1f} с'
+            )
+            selections = [
+                rng.sample(tags, rng.randint(2, 4))
+                for _ in range(options['queries'])
+            ]
+            for name, build in (
+                ('JOIN + DISTINCT', self.join_filter),
+                ('EXISTS', self.exists_filter),
+            ):
+                count, mean, p50 = self.measure(selections, build)
+                self.stdout.write(
+                    f'{name:<16} mean={mean:.1f} p50={p50:.1f} мс '
+                    f'(последний count={count})'
+                )
+                if options['explain']:
+                    self.stdout.write(build(selections[-1]).order_by(
+                        '-pub_date', '-id'
+                    )[:PER_PAGE_LIMIT].explain(analyze=True))
+            transaction.set_rollback(True)
@@ -0,0 +1,277 @@
+import http.client
+import json
+import random
+import re
+import statistics
+import subprocess
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from foodgram_backend.constants import PER_PAGE_LIMIT
+from rest_framework.authtoken.models import Token
+
+from api.management.commands.seed_benchmark_data import (BENCHMARK_PREFIX,
+                                                         get_benchmark_users)
+from recipes.models import Ingredient, Recipe, Tag
+
+SERVER_TIMING_DB = re.compile(r'db;dur=[\d.]+;desc="(\d+)"')
+
+
+AUTHENTICATED_SCENARIOS = {'subscriptions', 'shopping_list'}
+
+
+def get_scenarios(data):
+    scenarios = {
+        'recipes_feed': lambda rng: '/api/recipes/?page={}'.format(
+            rng.randint(1, data['recipe_pages'])
+        ),
+        'recipes_by_tags': lambda rng: '/api/recipes/?{}'.format('&'.join(
+            f'tags={slug}' for slug in rng.sample(data['tags'], 2)
+        )),
+        'recipe_detail': lambda rng: '/api/recipes/{}/'.format(
+            rng.choice(data['recipes'])
+        ),
+        'subscriptions': lambda rng: (
+            '/api/users/subscriptions/?recipes_limit=3'
+        ),
+        'users': lambda rng: '/api/users/?page={}'.format(
+            rng.randint(1, data['user_pages'])
+        ),
+        'ingredient_search': lambda rng: '/api/ingredients/?name={}'.format(
+            rng.choice(data['prefixes'])
+        ),
+        'shopping_list': lambda rng: '/api/recipes/download_shopping_cart/',
+    }
+    if connection.vendor == 'postgresql':
+        scenarios['recipes_search'] = lambda rng: (
+            '/api/recipes/?search={}'.format(rng.choice(data['words']))
+        )
+    return scenarios
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def get_pages(count, limit):
+    return max(1, min(limit, -(-count // PER_PAGE_LIMIT)))
+
+
+def percentile(timings, quantile):
+    return timings[min(int(len(timings) * quantile), len(timings) - 1)]
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест API по HTTP на данных seed_benchmark_data: '
+        'RPS, p50/p95/p99 и число SQL-запросов по эндпоинтам в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Адрес работающего сервера; по умолчанию запускается '
+                 'встроенный сервер на случайном порту.',
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--anonymous', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--scenario', action='append',
+            help='Запустить только указанные сценарии.',
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для JSON-отчёта, по умолчанию stdout.',
+        )
+
+    def load_data(self):
+        users = get_benchmark_users()
+        tokens = list(
+            Token.objects.filter(user__in=users).values_list('key', flat=True)
+        )
+        if not tokens:
+            raise CommandError('Сначала выполните seed_benchmark_data.')
+        names = Ingredient.objects.filter(
+            name__startswith=f'{BENCHMARK_PREFIX} '
+        ).values_list('name', flat=True)
+        recipes = list(Recipe.objects.filter(
+            author__in=users
+        ).values_list('id', flat=True))
+        return {
+            'tokens': tokens,
+            'recipes': recipes,
+            'recipe_pages': get_pages(len(recipes), 20),
+            'user_pages': get_pages(len(tokens), 10),
+            'tags': list(Tag.objects.filter(
+                slug__startswith=f'{BENCHMARK_PREFIX}-'
+            ).values_list('slug', flat=True)),
+            'prefixes': sorted({
+                name.split()[1][:3] for name in names
+            }),
+            'words': ['суп', 'курица', 'сыр', 'запечённый'],
+        }
+
+    def start_server(self):
+        settings.METRICS_ENABLED = True
+        server = ThreadedWSGIServer(
+            ('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=True
+        )
+        server.set_app(get_wsgi_application())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, f'http://127.0.0.1:{server.server_port}'
+
+    def request(self, host, port, path, token):
+        headers = {'Host': host}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        client = http.client.HTTPConnection(host, port, timeout=30)
+        start = time.perf_counter()
+        try:
+            client.request('GET', quote(path, safe='/?=&'), headers=headers)
+            response = client.getresponse()
+            body = response.read()
+            status = response.status
+            match = SERVER_TIMING_DB.search(
+                response.getheader('Server-Timing', '')
+            )
+        except OSError:
+            return time.perf_counter() - start, None, 0, None
+        finally:
+            client.close()
+        return (
+            time.perf_counter() - start,
+            status,
+            len(body),
+            int(match.group(1)) if match else None,
+        )
+
+    def run_scenario(self, url, build_path, tokens, options):
+        parts = urlsplit(url)
+        rng = random.Random(options['seed'])
+        jobs = [
+            (build_path(rng), None if options['anonymous']
+             else rng.choice(tokens))
+            for _ in range(options['warmup'] + options['requests'])
+        ]
+        for path, token in jobs[:options['warmup']]:
+            self.request(parts.hostname, parts.port, path, token)
+        jobs = jobs[options['warmup']:]
+        results = []
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    if not jobs:
+                        return
+                    path, token = jobs.pop()
+                result = self.request(parts.hostname, parts.port, path, token)
+                with lock:
+                    results.append(result)
+
+        threads = [
+            threading.Thread(target=worker)
+            for _ in range(options['concurrency'])
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        timings = sorted(result[0] * 1000 for result in results)
+        queries = [result[3] for result in results if result[3] is not None]
+        return {
+            'requests': len(results),
+            'errors': sum(
+                1 for result in results
+                if result[1] is None or result[1] >= 400
+            ),
+            'rps': round(len(results) / elapsed, 1),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'p50_ms': round(percentile(timings, 0.5), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+            'queries_mean': (
+                round(statistics.mean(queries), 2) if queries else None
+            ),
+            'queries_max': max(queries) if queries else None,
+            'bytes_mean': round(
+                statistics.mean(result[2] for result in results)
+            ),
+        }
+
+    def handle(self, *args, **options):
+        data = self.load_data()
+        scenarios = get_scenarios(data)
+        selected = options['scenario'] or [
+            name for name in scenarios
+            if not options['anonymous']
+            or name not in AUTHENTICATED_SCENARIOS
+        ]
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные сценарии: {", ".join(sorted(unknown))}'
+            )
+        server = None
+        url = options['url']
+        if url is None:
+            server, url = self.start_server()
+        report = {
+            'commit': get_commit(),
+            'database': connection.vendor,
+            'url': options['url'] or 'embedded',
+            'dataset': {
+                'users': len(data['tokens']),
+                'recipes': len(data['recipes']),
+                'tags': len(data['tags']),
+            },
+            'concurrency': options['concurrency'],
+            'anonymous': options['anonymous'],
+            'endpoints': {},
+        }
+        try:
+            for name in selected:
+                result = self.run_scenario(
+                    url, scenarios[name], data['tokens'], options
+                )
+                report['endpoints'][name] = result
+                self.stderr.write(
+                    f'{name:<18} {result["rps"]:>8} RPS  '
+                    f'p50={result["p50_ms"]} p95={result["p95_ms"]} '
+                    f'p99={result["p99_ms"]} мс  '
+                    f'запросов={result["queries_mean"]}  '
+                    f'ошибок={result["errors"]}',
+                    style_func=self.style.HTTP_INFO,
+                )
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import FavoriteView, ShoppingCartView
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import User
+
+ENDPOINTS = {
+    'favorite': (FavoriteView, Favorite, 'favorites_count'),
+    'shopping_cart': (ShoppingCartView, ShoppingCart, 'in_carts_count'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест конкурентных переключений избранного и корзины: '
+        'задержки p50/p95/p99, доля ошибок и согласованность счётчиков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--endpoint', choices=ENDPOINTS, default='favorite'
+        )
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--users', type=int, default=4)
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def worker(self, view, user, recipe_id, iterations, seed, results):
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        rng = random.Random(seed)
+        path = f'/api/recipes/{recipe_id}/'
+        for _ in range(iterations):
+            method = rng.choice(('post', 'delete'))
+            request = getattr(factory, method)(path)
+            force_authenticate(request, user=user)
+            start = time.perf_counter()
+            try:
+                status_code = view(request, id=recipe_id).status_code
+            except Exception as error:
+                status_code = type(error).__name__
+            results.append(((time.perf_counter() - start) * 1000, status_code))
+        connection.close()
+
+    def create_data(self, count):
+        suffix = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create(
+            User(
+                username=f'loadtest_{suffix}_{i}',
+                email=f'loadtest_{suffix}_{i}@example.com',
+            )
+            for i in range(count)
+        )
+        recipe, = Recipe.objects.bulk_create([Recipe(
+            author=users[0],
+            name=f'loadtest {suffix}',
+            text='loadtest',
+            image='media/recipes/loadtest.jpg',
+            cooking_time=1,
+        )])
+        return users, recipe
+
+    def handle(self, *args, **options):
+        view_class, model, counter = ENDPOINTS[options['endpoint']]
+        view = view_class.as_view()
+        users, recipe = self.create_data(options['users'])
+        try:
+            results = []
+            threads = [
+                threading.Thread(target=self.worker, args=(
+                    view,
+                    users[number % len(users)],
+                    recipe.id,
+                    options['iterations'],
+                    options['seed'] + number,
+                    results,
+                ))
+                for number in range(options['threads'])
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            self.report(results, elapsed, recipe, model, counter)
+        finally:
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+    def report(self, results, elapsed, recipe, model, counter):
+        timings = sorted(timing for timing, _ in results)
+        statuses = Counter(status for _, status in results)
+        errors = sum(
+            count for status, count in statuses.items()
+            if not isinstance(status, int) or status >= 500
+        )
+        recipe.refresh_from_db()
+        actual = model.objects.filter(recipe=recipe).count()
+        self.stdout.write(
+            f'{len(results)} запросов за {elapsed:.2f} с '
+            f'({len(results) / elapsed:.0f} RPS)'
+        )
+        self.stdout.write(
+            'p50={:.2f} p95={:.2f} p99={:.2f} мс'.format(*(
+                timings[min(int(len(timings) * q), len(timings) - 1)]
+                for q in (0.5, 0.95, 0.99)
+            ))
+        )
+        self.stdout.write(
+            f'ошибки: {errors} ({errors / len(results):.2%}), '
+            f'статусы: {dict(statuses)}'
+        )
+        self.stdout.write(
+            f'{counter}={getattr(recipe, counter)}, строк={actual}'
+        )
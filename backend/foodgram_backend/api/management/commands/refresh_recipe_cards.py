@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.cache import SharedCacheCommandMixin, invalidate
+from api.cards import refresh_cards
+from recipes.models import Recipe
+
+
+class Command(SharedCacheCommandMixin, BaseCommand):
+    help = (
+        'Пересобирает сохранённые карточки рецептов для ленты, например '
+        'после изменения RecipeSerializer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Собрать только отсутствующие карточки.',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        recipes = Recipe.objects.all()
+        if options['missing']:
+            recipes = recipes.filter(card__isnull=True)
+        count = refresh_cards(recipes)
+        invalidate('recipes')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {count} карточек за '
+            f'{time.perf_counter() - start:.1f} с.'
+        ))
@@ -0,0 +1,161 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from api.cache import SharedCacheCommandMixin, invalidate
+from api.cards import refresh_cards
+from recipes.counters import (RECIPE_COUNTERS, USER_COUNTERS,
+                              counter_expressions)
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            RecipeTag, ShoppingCart, Tag)
+from recipes.search import update_search_vector
+from users.models import Subscription, User
+
+BENCHMARK_PREFIX = 'bench'
+BATCH_SIZE = 5000
+WORDS = (
+    'суп', 'салат', 'пирог', 'рагу', 'паста', 'омлет', 'плов', 'каша',
+    'курица', 'говядина', 'рыба', 'грибы', 'сыр', 'томаты', 'чеснок',
+    'быстрый', 'домашний', 'острый', 'сливочный', 'запечённый',
+)
+
+
+def get_benchmark_users():
+    return User.objects.filter(username__startswith=f'{BENCHMARK_PREFIX}_')
+
+
+def clear_benchmark_data():
+    get_benchmark_users().delete()
+    Tag.objects.filter(slug__startswith=f'{BENCHMARK_PREFIX}-').delete()
+    Ingredient.objects.filter(
+        name__startswith=f'{BENCHMARK_PREFIX} '
+    ).delete()
+
+
+class Command(SharedCacheCommandMixin, BaseCommand):
+    help = (
+        'Создаёт синтетические данные для нагрузочного тестирования API: '
+        'пользователей с токенами, рецепты, избранное, корзины и подписки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--ingredients', type=int, default=500)
+        parser.add_argument('--tags', type=int, default=8)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--cart-per-user', type=int, default=10)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Только удалить ранее созданные данные.',
+        )
+
+    def bulk_create(self, model, objects):
+        objects = list(objects)
+        for offset in range(0, len(objects), BATCH_SIZE):
+            model.objects.bulk_create(objects[offset:offset + BATCH_SIZE])
+        return objects
+
+    def create_relations(self, rng, model, users, targets, per_user, field):
+        return self.bulk_create(model, (
+            model(user=user, **{field: target})
+            for user in users
+            for target in rng.sample(
+                [target for target in targets if target != user],
+                min(per_user, len(targets) - (user in targets)),
+            )
+        ))
+
+    @transaction.atomic
+    def create_data(self, rng, options):
+        users = self.bulk_create(User, (
+            User(
+                username=f'{BENCHMARK_PREFIX}_{i}',
+                email=f'{BENCHMARK_PREFIX}_{i}@example.com',
+                first_name='Бенчмарк',
+                last_name=str(i),
+            )
+            for i in range(options['users'])
+        ))
+        users = list(get_benchmark_users().order_by('id'))
+        self.bulk_create(Token, (
+            Token(user=user, key=Token.generate_key()) for user in users
+        ))
+        tags = self.bulk_create(Tag, (
+            Tag(name=f'Бенчмарк {i}', slug=f'{BENCHMARK_PREFIX}-{i}')
+            for i in range(options['tags'])
+        ))
+        ingredients = self.bulk_create(Ingredient, (
+            Ingredient(
+                name=f'{BENCHMARK_PREFIX} {rng.choice(WORDS)} {i}',
+                measurement_unit=rng.choice(('г', 'мл', 'шт.')),
+            )
+            for i in range(options['ingredients'])
+        ))
+        recipes = []
+        for offset in range(0, options['recipes'], BATCH_SIZE):
+            recipes += Recipe.objects.bulk_create(
+                Recipe(
+                    author=rng.choice(users),
+                    name=' '.join(rng.sample(WORDS, 3)).capitalize(),
+                    text=' '.join(rng.choices(WORDS, k=40)),
+                    image='media/recipes/benchmark.jpg',
+                    cooking_time=rng.randint(5, 180),
+                )
+                for _ in range(min(BATCH_SIZE, options['recipes'] - offset))
+            )
+        self.bulk_create(RecipeTag, (
+            RecipeTag(recipe=recipe, tag=tag)
+            for recipe in recipes
+            for tag in rng.sample(tags, rng.randint(1, min(3, len(tags))))
+        ))
+        self.bulk_create(RecipeIngredient, (
+            RecipeIngredient(
+                recipe=recipe, ingredient=ingredient,
+                amount=rng.randint(1, 500),
+            )
+            for recipe in recipes
+            for ingredient in rng.sample(
+                ingredients,
+                min(options['ingredients_per_recipe'], len(ingredients)),
+            )
+        ))
+        self.create_relations(
+            rng, Favorite, users, recipes,
+            options['favorites_per_user'], 'recipe',
+        )
+        self.create_relations(
+            rng, ShoppingCart, users, recipes,
+            options['cart_per_user'], 'recipe',
+        )
+        self.create_relations(
+            rng, Subscription, users, users,
+            options['subscriptions_per_user'], 'author',
+        )
+        recipes = Recipe.objects.filter(author__in=users)
+        recipes.update(**counter_expressions(Recipe, RECIPE_COUNTERS))
+        get_benchmark_users().update(
+            **counter_expressions(User, USER_COUNTERS)
+        )
+        update_search_vector(recipes)
+        refresh_cards(recipes)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        clear_benchmark_data()
+        if not options['clear']:
+            self.create_data(random.Random(options['seed']), options)
+        for namespace in ('tags', 'ingredients', 'recipes'):
+            invalidate(namespace)
+        users = get_benchmark_users()
+        recipes = Recipe.objects.filter(author__in=users)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - start:.1f} с: '
+            f'пользователей {users.count()}, рецептов {recipes.count()}.'
+        ))
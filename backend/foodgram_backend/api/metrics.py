@@ -0,0 +1,275 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+from foodgram_backend.constants import METRICS_LATENCY_BUCKETS
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+NUMBER = re.compile(r'\b\d+\b')
+STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+def get_query_shape(sql):
+    sql = NUMBER.sub('?', STRING.sub('?', sql))
+    return PLACEHOLDER_LIST.sub('(...)', sql)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[get_query_shape(sql)] += 1
+
+
+class StageTimer:
+    def __init__(self):
+        self.durations = Counter()
+        self.depth = Counter()
+
+    @contextmanager
+    def measure(self, stage):
+        self.depth[stage] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.depth[stage] -= 1
+            if not self.depth[stage]:
+                self.durations[stage] += time.perf_counter() - start
+
+
+current_timer = ContextVar('current_timer', default=None)
+
+
+@contextmanager
+def measure(stage):
+    timer = current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.measure(stage):
+        yield
+
+
+def instrument_serializers():
+    data = BaseSerializer.data.fget
+    if getattr(data, 'measured', False):
+        return
+
+    def measured_data(self):
+        with measure('serialize'):
+            return data(self)
+
+    measured_data.measured = True
+    BaseSerializer.data = property(measured_data)
+
+
+class MeasuredStream:
+    def __init__(self, content, timer, on_close):
+        self.content = content
+        self.timer = timer
+        self.on_close = on_close
+        self.size = 0
+
+    def __iter__(self):
+        content = iter(self.content)
+        while True:
+            with self.timer.measure('render'):
+                chunk = next(content, None)
+            if chunk is None:
+                return
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        on_close, self.on_close = self.on_close, None
+        if on_close is not None:
+            on_close(self.size)
+
+
+class MetricsRegistry:
+    counters = (
+        ('requests_total', 'Количество запросов.'),
+        ('db_queries_total', 'Количество SQL-запросов.'),
+        ('db_duration_seconds_total', 'Время в базе данных.'),
+        ('serialize_duration_seconds_total', 'Время сериализации данных.'),
+        ('render_duration_seconds_total', 'Время рендеринга ответа.'),
+        ('response_bytes_total', 'Объём ответов.'),
+        ('n_plus_one_total', 'Запросы с повторяющимися SQL-запросами.'),
+    )
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.values = defaultdict(Counter)
+        self.histograms = defaultdict(lambda: [0] * (len(buckets) + 1))
+        self.durations = Counter()
+
+    def record(self, labels, duration, **values):
+        with self.lock:
+            self.values[labels].update(values)
+            self.values[labels]['requests_total'] += 1
+            self.durations[labels] += duration
+            histogram = self.histograms[labels]
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    histogram[index] += 1
+            histogram[-1] += 1
+
+    def format_labels(self, labels, **extra):
+        pairs = dict(zip(('method', 'view', 'status'), labels), **extra)
+        return ','.join(
+            f'{name}="{value}"' for name, value in pairs.items()
+        )
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, description in self.counters:
+                lines.append(f'# HELP foodgram_{name} {description}')
+                lines.append(f'# TYPE foodgram_{name} counter')
+                for labels, values in self.values.items():
+                    lines.append(
+                        f'foodgram_{name}{{{self.format_labels(labels)}}} '
+                        f'{values[name]}'
+                    )
+            name = 'foodgram_request_duration_seconds'
+            lines.append(f'# HELP {name} Время обработки запроса.')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, histogram in self.histograms.items():
+                for bound, count in zip(self.buckets, histogram):
+                    lines.append(
+                        f'{name}_bucket'
+                        f'{{{self.format_labels(labels, le=bound)}}} {count}'
+                    )
+                lines.append(
+                    f'{name}_bucket'
+                    f'{{{self.format_labels(labels, le="+Inf")}}} '
+                    f'{histogram[-1]}'
+                )
+                lines.append(
+                    f'{name}_sum{{{self.format_labels(labels)}}} '
+                    f'{self.durations[labels]}'
+                )
+                lines.append(
+                    f'{name}_count{{{self.format_labels(labels)}}} '
+                    f'{histogram[-1]}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry(METRICS_LATENCY_BUCKETS)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        instrument_serializers()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        timer = StageTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            token = current_timer.set(timer)
+            try:
+                response = self.get_response(request)
+            finally:
+                current_timer.reset(token)
+            if response.streaming and not response.is_async:
+                wrappers = stack.pop_all()
+
+                def finish_stream(size):
+                    wrappers.close()
+                    self.record(
+                        request, response, recorder, timer, start, size
+                    )
+
+                response.streaming_content = MeasuredStream(
+                    response.streaming_content, timer, finish_stream
+                )
+                self.set_server_timing(response, recorder, timer, start)
+                return response
+        self.record(
+            request, response, recorder, timer, start,
+            0 if response.streaming else len(response.content),
+        )
+        self.set_server_timing(response, recorder, timer, start)
+        return response
+
+    def record(self, request, response, recorder, timer, start, size):
+        duration = time.perf_counter() - start
+        repeated = [
+            (shape, count) for shape, count in recorder.shapes.items()
+            if count > settings.METRICS_N_PLUS_ONE_THRESHOLD
+        ]
+        for shape, count in repeated:
+            logger.warning(
+                'N+1: %s одинаковых запросов в %s %s: %s',
+                count, request.method, request.path, shape,
+            )
+        match = request.resolver_match
+        registry.record(
+            (
+                request.method,
+                match.view_name if match else 'unmatched',
+                response.status_code,
+            ),
+            duration,
+            db_queries_total=recorder.count,
+            db_duration_seconds_total=recorder.duration,
+            serialize_duration_seconds_total=timer.durations['serialize'],
+            render_duration_seconds_total=timer.durations['render'],
+            response_bytes_total=size,
+            n_plus_one_total=int(bool(repeated)),
+        )
+
+    def set_server_timing(self, response, recorder, timer, start):
+        response['Server-Timing'] = (
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count}", '
+            f'serialize;dur={timer.durations["serialize"] * 1000:.1f}, '
+            f'render;dur={timer.durations["render"] * 1000:.1f}, '
+            f'total;dur={(time.perf_counter() - start) * 1000:.1f}'
+        )
+
+    def process_template_response(self, request, response):
+        timer = current_timer.get()
+        start = time.perf_counter()
+
+        def finish_render(response):
+            timer.durations['render'] += time.perf_counter() - start
+
+        response.add_post_render_callback(finish_render)
+        return response
+
+
+def metrics(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
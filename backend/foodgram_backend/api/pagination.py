@@ -1,7 +1,128 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
 from foodgram_backend.constants import PER_PAGE_LIMIT
+from rest_framework import exceptions
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = PER_PAGE_LIMIT
+    cursor_query_param = 'cursor'
+    cursor_ordering = None
+    cursor_excluded_params = ()
+    invalid_cursor_message = 'Неверный курсор.'
+    excluded_param_message = 'Нельзя использовать вместе с параметром {}.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            self.cursor_ordering is not None
+            and self.cursor_query_param in request.query_params
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        for param in self.cursor_excluded_params:
+            if request.query_params.get(param):
+                raise exceptions.ValidationError({
+                    self.cursor_query_param: [
+                        self.excluded_param_message.format(param)
+                    ],
+                })
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.cursor_ordering)
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            queryset = self.seek(queryset, self.decode_cursor(cursor))
+        page = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self.encode_cursor(page[-1])
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_cursor_link(),
+            'results': data,
+        })
+
+    def get_next_cursor_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor,
+        )
+
+    def get_cursor_fields(self, model):
+        return [
+            (
+                model._meta.get_field(ordering.lstrip('-')),
+                ordering.startswith('-'),
+            )
+            for ordering in self.cursor_ordering
+        ]
+
+    def encode_cursor(self, instance):
+        values = [
+            field.value_to_string(instance)
+            for field, _ in self.get_cursor_fields(type(instance))
+        ]
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(values, list)
+            or len(values) != len(self.cursor_ordering)
+            or not all(
+                isinstance(value, str) and '\x00' not in value
+                for value in values
+            )
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def seek(self, queryset, values):
+        fields = self.get_cursor_fields(queryset.model)
+        try:
+            values = [
+                field.to_python(value)
+                for (field, _), value in zip(fields, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(fields, values):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{field.name}__{lookup}': value})
+            equal &= Q(**{field.name: value})
+        first_field, descending = fields[0]
+        lookup = 'lte' if descending else 'gte'
+        return queryset.filter(
+            Q(**{f'{first_field.name}__{lookup}': values[0]}), condition
+        )
+
+
+class RecipePagination(CustomPagination):
+    cursor_ordering = ('-pub_date', '-id')
+    cursor_excluded_params = ('search',)
+
+
+class SubscriptionPagination(CustomPagination):
+    cursor_ordering = ('username', 'id')
@@ -0,0 +1,148 @@
+import csv
+from abc import ABCMeta, abstractmethod
+from io import BytesIO
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SHOPPING_LIST_TITLE = 'Список покупок:'
+LINE_SEPARATORS = (
+    ('\u2028'.encode(), b'\\u2028'),
+    ('\u2029'.encode(), b'\\u2029'),
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in content:
+                content = content.replace(separator, escaped)
+        return content
+
+
+def format_amount(amount):
+    return f'{amount:g}'
+
+
+class ShoppingListRenderer(BaseRenderer, metaclass=ABCMeta):
+    charset = 'utf-8'
+    streaming = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return str(data.get('detail', data)).encode('utf-8')
+        return b''.join(self.stream(data))
+
+    @abstractmethod
+    def stream(self, ingredients):
+        pass
+
+
+class ShoppingListTextRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, ingredients):
+        yield f'{SHOPPING_LIST_TITLE}\n'.encode(self.charset)
+        for ingredient in ingredients:
+            yield (
+                f"{ingredient['name']} - "
+                f"{format_amount(ingredient['amount'])} "
+                f"{ingredient['measurement_unit']}\n"
+            ).encode(self.charset)
+
+
+class EchoBuffer:
+    def write(self, value):
+        return value
+
+
+class ShoppingListCSVRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, ingredients):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(
+            ['name', 'amount', 'measurement_unit']
+        ).encode(self.charset)
+        for ingredient in ingredients:
+            yield writer.writerow([
+                ingredient['name'],
+                format_amount(ingredient['amount']),
+                ingredient['measurement_unit'],
+            ]).encode(self.charset)
+
+
+class ShoppingListPDFRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    streaming = False
+    font_name = 'ShoppingListFont'
+    font_size = 12
+    line_height = 7 * mm
+    margin = 20 * mm
+
+    def get_font(self):
+        if self.font_name in pdfmetrics.getRegisteredFontNames():
+            return self.font_name
+        try:
+            pdfmetrics.registerFont(
+                TTFont(self.font_name, settings.SHOPPING_LIST_FONT)
+            )
+        except Exception:
+            return 'Helvetica'
+        return self.font_name
+
+    def stream(self, ingredients):
+        buffer = BytesIO()
+        font = self.get_font()
+        width, height = A4
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        pdf.setFont(font, self.font_size + 4)
+        y = height - self.margin
+        pdf.drawString(self.margin, y, SHOPPING_LIST_TITLE)
+        pdf.setFont(font, self.font_size)
+        for ingredient in ingredients:
+            y -= self.line_height
+            if y < self.margin:
+                pdf.showPage()
+                pdf.setFont(font, self.font_size)
+                y = height - self.margin
+            pdf.drawString(
+                self.margin,
+                y,
+                f"• {ingredient['name']} - "
+                f"{format_amount(ingredient['amount'])} "
+                f"{ingredient['measurement_unit']}"
+            )
+        pdf.save()
+        yield buffer.getvalue()
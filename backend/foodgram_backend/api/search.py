@@ -0,0 +1,99 @@
+import re
+from bisect import bisect_left
+from collections import Counter
+
+from api.cache import get_version
+from recipes.models import Ingredient
+
+TRIGRAM_SIMILARITY_THRESHOLD = 0.3
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def get_trigrams(value):
+    trigrams = set()
+    for word in WORD_PATTERN.findall(value):
+        padded = f'  {word} '
+        trigrams.update(
+            padded[i:i + 3] for i in range(len(padded) - 2)
+        )
+    return trigrams
+
+
+class IngredientIndex:
+
+    def __init__(self, ingredients):
+        self.items = sorted(
+            (
+                {
+                    'id': ingredient['id'],
+                    'name': ingredient['name'],
+                    'measurement_unit': ingredient['measurement_unit'],
+                }
+                for ingredient in ingredients
+            ),
+            key=lambda item: (item['name'].casefold(), item['id']),
+        )
+        self.keys = [item['name'].casefold() for item in self.items]
+        self.trigrams = [get_trigrams(key) for key in self.keys]
+        self.postings = {}
+        for position, trigrams in enumerate(self.trigrams):
+            for trigram in trigrams:
+                self.postings.setdefault(trigram, []).append(position)
+
+    def search(self, query, limit=None):
+        query = query.strip().casefold()
+        if not query:
+            return self.items[:limit]
+        found = []
+        seen = set()
+        position = bisect_left(self.keys, query)
+        while (
+            position < len(self.keys)
+            and self.keys[position].startswith(query)
+        ):
+            found.append(position)
+            seen.add(position)
+            position += 1
+        if limit is None or len(found) < limit:
+            found.extend(
+                position for position, key in enumerate(self.keys)
+                if position not in seen and query in key
+            )
+            seen.update(found)
+        if limit is None or len(found) < limit:
+            found.extend(self.search_similar(query, seen))
+        return [self.items[position] for position in found[:limit]]
+
+    def search_similar(self, query, exclude):
+        query_trigrams = get_trigrams(query)
+        if not query_trigrams:
+            return []
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self.postings.get(trigram, ()))
+        ranked = []
+        for position, common in shared.items():
+            if position in exclude:
+                continue
+            similarity = common / (
+                len(query_trigrams) + len(self.trigrams[position]) - common
+            )
+            if similarity >= TRIGRAM_SIMILARITY_THRESHOLD:
+                ranked.append((-similarity, self.keys[position], position))
+        ranked.sort()
+        return [position for _, _, position in ranked]
+
+
+_index = None
+_index_version = None
+
+
+def get_ingredient_index():
+    global _index, _index_version
+    version = get_version('ingredients')
+    if _index is None or _index_version != version:
+        _index = IngredientIndex(
+            Ingredient.objects.values('id', 'name', 'measurement_unit')
+        )
+        _index_version = version
+    return _index
@@ -1,5 +1,8 @@
+from django.core.files.storage import default_storage
 from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from drf_extra_fields.fields import Base64ImageField
+from foodgram_backend.constants import BULK_RECIPES_LIMIT
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
@@ -8,6 +11,36 @@ from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
 from users.models import Subscription, User
 
 
+def get_variant_urls(request, image, variants):
+    if not image or variants.get('source') != image.name:
+        return None
+    urls = {}
+    for variant, files in variants.items():
+        if variant == 'source':
+            continue
+        urls[variant] = {}
+        for extension, name in files.items():
+            url = default_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[variant][extension] = url
+    return urls
+
+
+def get_subscribed_ids(context):
+    if 'subscribed_ids' not in context:
+        request = context.get('request')
+        if request is None or request.user.is_anonymous:
+            context['subscribed_ids'] = frozenset()
+        else:
+            context['subscribed_ids'] = frozenset(
+                Subscription.objects.filter(
+                    user=request.user
+                ).values_list('author_id', flat=True)
+            )
+    return context['subscribed_ids']
+
+
 class AvatarSerializer(serializers.ModelSerializer):
     avatar = Base64ImageField(allow_null=True)
 
@@ -19,6 +52,7 @@ class AvatarSerializer(serializers.ModelSerializer):
 class UserSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     avatar = Base64ImageField(allow_null=True, required=False)
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -30,16 +64,16 @@ class UserSerializer(serializers.ModelSerializer):
             'last_name',
             'is_subscribed',
             'avatar',
+            'avatar_variants',
         ]
 
+    def get_avatar_variants(self, obj):
+        return get_variant_urls(
+            self.context.get('request'), obj.avatar, obj.avatar_variants
+        )
+
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return Subscription.objects.filter(
-            user=request.user,
-            author=obj
-        ).exists()
+        return obj.id in get_subscribed_ids(self.context)
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -88,6 +122,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         method_name='get_is_favorited')
     is_in_shopping_cart = serializers.SerializerMethodField(
         method_name='get_is_in_shopping_cart')
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -100,18 +135,33 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
         ]
 
     def get_ingredients(self, obj):
-        ingredients = RecipeIngredient.objects.filter(recipe=obj)
-        return RecipeIngredientSerializer(ingredients, many=True).data
+        return RecipeIngredientSerializer(
+            obj.ingredient_list.all(), many=True
+        ).data
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if hasattr(instance, 'search_headline'):
+            data['search_headline'] = instance.search_headline
+        return data
+
+    def get_image_variants(self, obj):
+        return get_variant_urls(
+            self.context.get('request'), obj.image, obj.image_variants
+        )
 
     def get_is_favorited(self, obj):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return Favorite.objects.filter(
             user=request.user,
             recipe_id=obj,
@@ -121,6 +171,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return ShoppingCart.objects.filter(
             user=request.user,
             recipe_id=obj,
@@ -179,6 +231,9 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
 
         ingredient_ids = [ingredient.get('id') for ingredient in ingredients]
         existing_ingredients = Ingredient.objects.filter(id__in=ingredient_ids)
+        self.ingredients_by_id = {
+            ingredient.id: ingredient for ingredient in existing_ingredients
+        }
 
         if len(existing_ingredients) != len(ingredient_ids):
             existing_ids = {
@@ -232,19 +287,60 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         return data
 
     def create_tags(self, tags, recipe):
-        for tag in tags:
-            RecipeTag.objects.create(recipe=recipe, tag=tag)
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag=tag) for tag in tags
+        )
 
     def create_ingredients(self, ingredients, recipe):
-        recipe_ingredients = [
+        return RecipeIngredient.objects.bulk_create(
             RecipeIngredient(
-                ingredient_id=ingr['id'],
+                ingredient=self.ingredients_by_id[ingr['id']],
                 recipe=recipe,
                 amount=ingr['amount'],
             ) for ingr in ingredients
-        ]
+        )
 
-        RecipeIngredient.objects.bulk_create(recipe_ingredients)
+    def update_tags(self, tags, recipe):
+        new_ids = {tag.id for tag in tags}
+        old_ids = {tag.id for tag in recipe.tags.all()}
+        if old_ids - new_ids:
+            RecipeTag.objects.filter(
+                recipe=recipe, tag_id__in=old_ids - new_ids
+            ).delete()
+        self.create_tags(
+            [tag for tag in tags if tag.id not in old_ids], recipe
+        )
+
+    def update_ingredients(self, ingredients, recipe):
+        amounts = {ingr['id']: ingr['amount'] for ingr in ingredients}
+        kept, changed, removed = [], [], []
+        for recipe_ingredient in recipe.ingredient_list.all():
+            amount = amounts.pop(recipe_ingredient.ingredient_id, None)
+            if amount is None:
+                removed.append(recipe_ingredient.id)
+                continue
+            if recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+            kept.append(recipe_ingredient)
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        created = self.create_ingredients(
+            [ingr for ingr in ingredients if ingr['id'] in amounts], recipe
+        )
+        return sorted(
+            kept + created,
+            key=lambda recipe_ingredient: recipe_ingredient.id,
+            reverse=True,
+        )
+
+    def cache_related(self, tags, recipe_ingredients):
+        self.related_objects = {
+            'tags': tags,
+            'ingredient_list': recipe_ingredients,
+        }
 
     @transaction.atomic
     def create(self, validated_data):
@@ -255,67 +351,88 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
 
         self.create_tags(tags, recipe)
-        self.create_ingredients(ingredients, recipe)
-
+        self.cache_related(
+            tags, self.create_ingredients(ingredients, recipe)[::-1]
+        )
+        recipe.is_favorited = False
+        recipe.is_in_shopping_cart = False
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients', None)
         tags = validated_data.pop('tags', None)
 
-        instance = super().update(instance, validated_data)
-
-        # Обработка изображения
-        if 'image' in validated_data and validated_data['image']:
-            instance.image = validated_data.pop('image')
-
         if ingredients is not None:
-            RecipeIngredient.objects.filter(recipe=instance).delete()
-            self.create_ingredients(ingredients, instance)
+            recipe_ingredients = self.update_ingredients(
+                ingredients, instance
+            )
+        else:
+            recipe_ingredients = list(instance.ingredient_list.all())
 
         if tags is not None:
-            RecipeTag.objects.filter(recipe=instance).delete()
-            self.create_tags(tags, instance)
+            self.update_tags(tags, instance)
+        else:
+            tags = list(instance.tags.all())
 
-        instance.save()
+        instance = super().update(instance, validated_data)
+        self.cache_related(tags, recipe_ingredients)
         return instance
 
     def to_representation(self, instance):
+        related_objects = getattr(self, 'related_objects', None)
+        if related_objects is None:
+            prefetch_related_objects(
+                [instance],
+                'tags',
+                Prefetch(
+                    'ingredient_list',
+                    queryset=RecipeIngredient.objects.select_related(
+                        'ingredient'
+                    ),
+                ),
+            )
+        else:
+            cache = instance.__dict__.setdefault(
+                '_prefetched_objects_cache', {}
+            )
+            for name, objects in related_objects.items():
+                queryset = getattr(instance, name).all()
+                queryset._result_cache = list(objects)
+                queryset._prefetch_done = True
+                cache[name] = queryset
         return RecipeSerializer(instance, context=self.context).data
 
 
 class ShowFavoriteSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Recipe
-        fields = ['id', 'name', 'image', 'cooking_time']
-
+    image_variants = serializers.SerializerMethodField()
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
     class Meta:
-        model = ShoppingCart
-        fields = ['user', 'recipe']
+        model = Recipe
+        fields = ['id', 'name', 'image', 'image_variants', 'cooking_time']
 
-    def to_representation(self, instance):
-        return ShowFavoriteSerializer(instance.recipe, context={
-            'request': self.context.get('request')
-        }).data
+    def get_image_variants(self, obj):
+        return get_variant_urls(
+            self.context.get('request'), obj.image, obj.image_variants
+        )
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Favorite
-        fields = ['user', 'recipe']
+class RecipeIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_RECIPES_LIMIT,
+    )
 
-    def to_representation(self, instance):
-        return ShowFavoriteSerializer(instance.recipe, context={
-            'request': self.context.get('request')
-        }).data
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
 
 
 class ViewSubscriptionSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -329,23 +446,28 @@ class ViewSubscriptionSerializer(serializers.ModelSerializer):
             'recipes',
             'recipes_count',
             'avatar',
+            'avatar_variants',
         ]
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return Subscription.objects.filter(
-            user=request.user,
-            author=obj
-        ).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in get_subscribed_ids(self.context)
+
+    def get_avatar_variants(self, obj):
+        return get_variant_urls(
+            self.context.get('request'), obj.avatar, obj.avatar_variants
+        )
 
     def get_recipes(self, obj):
         request = self.context.get('request')
-        recipes = Recipe.objects.filter(author=obj)
-        limit = request.query_params.get('recipes_limit', None)
-        if limit:
-            recipes = recipes[:int(limit)]
+        if hasattr(obj, 'recipes_preview'):
+            recipes = obj.recipes_preview
+        else:
+            recipes = Recipe.objects.filter(author=obj)
+            limit = request.query_params.get('recipes_limit', None)
+            if limit:
+                recipes = recipes[:int(limit)]
         return ShowFavoriteSerializer(
             recipes,
             many=True,
@@ -353,7 +475,7 @@ class ViewSubscriptionSerializer(serializers.ModelSerializer):
         ).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
+        return obj.recipes_count
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
@@ -0,0 +1,172 @@
+import logging
+import string
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import Case, F, Value, When
+from foodgram_backend.constants import (SHORT_LINK_FLUSH_INTERVAL,
+                                        SHORT_LINK_FLUSH_SIZE,
+                                        SHORT_LINK_LENGTH,
+                                        SHORT_LINK_LOCAL_CACHE_SIZE,
+                                        SHORT_LINK_LOCAL_TIMEOUT,
+                                        SHORT_LINK_MULTIPLIER,
+                                        SHORT_LINK_NEGATIVE_TIMEOUT)
+
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+ALPHABET = string.digits + string.ascii_letters
+MODULUS = len(ALPHABET) ** SHORT_LINK_LENGTH
+INVERSE = pow(SHORT_LINK_MULTIPLIER, -1, MODULUS)
+SHORT_LINK_CACHE_PREFIX = 'short-link'
+MISSING = 0
+MAX_PK = 2 ** 63 - 1
+
+
+def encode(pk):
+    number = pk * SHORT_LINK_MULTIPLIER % MODULUS
+    code = []
+    for _ in range(SHORT_LINK_LENGTH):
+        number, digit = divmod(number, len(ALPHABET))
+        code.append(ALPHABET[digit])
+    code = ''.join(reversed(code))
+    if code.isdigit():
+        return str(pk)
+    return code
+
+
+def decode(code):
+    if code.isascii() and code.isdigit():
+        if code.startswith('0') or len(code) > len(str(MAX_PK)):
+            return None
+        pk = int(code)
+        return pk if pk <= MAX_PK else None
+    if len(code) != SHORT_LINK_LENGTH:
+        return None
+    number = 0
+    for char in code:
+        digit = ALPHABET.find(char)
+        if digit < 0:
+            return None
+        number = number * len(ALPHABET) + digit
+    return number * INVERSE % MODULUS or None
+
+
+class LRUCache:
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.timeout)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+class HitCounter:
+    def __init__(self, interval, size):
+        self.interval = interval
+        self.size = size
+        self.hits = Counter()
+        self.total = 0
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add(self, pk):
+        with self.lock:
+            self.hits[pk] += 1
+            self.total += 1
+        self.flush_if_due()
+
+    def flush_if_due(self):
+        with self.lock:
+            due = self.total and (
+                self.total >= self.size
+                or time.monotonic() - self.flushed_at >= self.interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            hits, self.hits = self.hits, Counter()
+            self.total = 0
+            self.flushed_at = time.monotonic()
+        if not hits:
+            return
+        try:
+            with transaction.atomic():
+                Recipe.objects.filter(pk__in=hits).update(
+                    short_link_hits=F('short_link_hits') + Case(
+                        *(When(pk=pk, then=Value(count))
+                          for pk, count in hits.items()),
+                        default=Value(0),
+                    )
+                )
+        except DatabaseError:
+            logger.exception(
+                'Не удалось сохранить %s переходов по коротким ссылкам.',
+                sum(hits.values()),
+            )
+
+
+local_cache = LRUCache(SHORT_LINK_LOCAL_CACHE_SIZE, SHORT_LINK_LOCAL_TIMEOUT)
+hit_counter = HitCounter(SHORT_LINK_FLUSH_INTERVAL, SHORT_LINK_FLUSH_SIZE)
+
+
+def get_cache_key(code):
+    return f'{SHORT_LINK_CACHE_PREFIX}:{code}'
+
+
+def resolve(code):
+    decoded = decode(code)
+    if decoded is None:
+        return MISSING
+    entry = local_cache.get(code)
+    if entry is not None:
+        return entry[0]
+    pk = cache.get(get_cache_key(code))
+    if pk is None:
+        pk = decoded
+        if not Recipe.objects.filter(pk=pk).exists():
+            pk = MISSING
+        cache.set(
+            get_cache_key(code),
+            pk,
+            settings.SHORT_LINK_CACHE_TIMEOUT if pk
+            else SHORT_LINK_NEGATIVE_TIMEOUT,
+        )
+    local_cache.set(code, pk)
+    return pk
+
+
+def forget(pk):
+    code = encode(pk)
+    keys = [code, str(pk)]
+    cache.delete_many([get_cache_key(key) for key in keys])
+    for key in keys:
+        local_cache.delete(key)
@@ -0,0 +1,80 @@
+from django.core.signals import request_started
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import get_user_namespace, invalidate
+from api.cards import clear_cards_for, schedule_card_update
+from api.shortlinks import forget, hit_counter
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            RecipeTag, ShoppingCart, Tag)
+from users.models import Subscription, User
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    invalidate('tags')
+    invalidate('recipes')
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    invalidate('ingredients')
+    invalidate('recipes')
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+@receiver([post_save, post_delete], sender=RecipeTag)
+def invalidate_recipes(sender, **kwargs):
+    invalidate('recipes')
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        invalidate('recipes')
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_card(sender, instance, **kwargs):
+    schedule_card_update([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+@receiver([post_save, post_delete], sender=RecipeTag)
+def update_related_recipe_card(sender, instance, **kwargs):
+    schedule_card_update([instance.recipe_id])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=User)
+def clear_recipe_cards(sender, instance, created, update_fields=None,
+                       **kwargs):
+    if created:
+        return
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        clear_cards_for(sender, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver([post_save, post_delete], sender=ShoppingCart)
+@receiver([post_save, post_delete], sender=Subscription)
+def invalidate_user_recipes(sender, instance, **kwargs):
+    invalidate(get_user_namespace(instance.user_id))
+
+
+@receiver(post_save, sender=Recipe)
+def forget_missing_short_link(sender, instance, created, **kwargs):
+    if created:
+        forget(instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_short_link(sender, instance, **kwargs):
+    forget(instance.pk)
+
+
+@receiver(request_started)
+def flush_short_link_hits(sender, **kwargs):
+    hit_counter.flush_if_due()
@@ -0,0 +1,476 @@
+import shutil
+import tempfile
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.cards import refresh_cards
+from api.metrics import get_query_shape, registry
+from api.renderers import ShoppingListRenderer
+from api.shortlinks import MISSING, HitCounter, decode, encode, get_cache_key
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            RecipeTag, ShoppingCart, Tag)
+from recipes.search import update_search_vector
+from users.models import Subscription, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests',
+    },
+}
+IMAGE = (
+    'data:image/gif;base64,'
+    'R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
+)
+SMALL = 1
+LARGE = 6
+
+
+class QueryCountMixin:
+
+    def count_queries(self, request, expected_status):
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, expected_status)
+        return Counter(
+            get_query_shape(query['sql']) for query in queries.captured_queries
+        )
+
+    def assertSameQueryCount(self, request, expected_status):
+        small, large = (
+            self.count_queries(lambda: request(size), expected_status)
+            for size in (SMALL, LARGE)
+        )
+        self.assertEqual(
+            sum(small.values()),
+            sum(large.values()),
+            '\n'.join(
+                f'+{count} {shape}' for shape, count in (large - small).items()
+            ),
+        )
+
+
+@override_settings(
+    CACHES=DUMMY_CACHES, MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_ASYNC=False
+)
+class RecipeQueryCountTests(QueryCountMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@example.com',
+            first_name='Автор', last_name='Рецептов',
+        )
+        cls.viewer = User.objects.create(
+            username='viewer', email='viewer@example.com'
+        )
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', slug=f'tag-{i}') for i in range(2)
+        )
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(LARGE)
+        )
+        cls.recipes = {
+            size: cls.create_recipe(f'Рецепт на {size}', size)
+            for size in (SMALL, LARGE)
+        }
+
+    @classmethod
+    def create_recipe(cls, name, size):
+        recipe = Recipe.objects.create(
+            author=cls.author, name=name, text='Описание.',
+            image='recipes/test.gif', cooking_time=10,
+        )
+        recipe.tags.set(cls.tags)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=10)
+            for ingredient in cls.ingredients[:size]
+        )
+        return recipe
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def get_client(self, user):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def get_payload(self, size):
+        return {
+            'name': f'Новый рецепт на {size}',
+            'text': 'Описание.',
+            'cooking_time': 15,
+            'image': IMAGE,
+            'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 5}
+                for ingredient in self.ingredients[:size]
+            ],
+        }
+
+    def test_list(self):
+        flags = {'is_favorited': set(), 'is_in_shopping_cart': set()}
+        for i in range(LARGE):
+            recipe = self.create_recipe(f'Рецепт ленты {i}', i + 1)
+            if i % 2:
+                Favorite.objects.create(user=self.viewer, recipe=recipe)
+                flags['is_favorited'].add(recipe.id)
+            else:
+                ShoppingCart.objects.create(user=self.viewer, recipe=recipe)
+                flags['is_in_shopping_cart'].add(recipe.id)
+        refresh_cards(Recipe.objects.all())
+        for user in (None, self.viewer):
+            with self.subTest(user=user):
+                client = self.get_client(user)
+                self.assertSameQueryCount(
+                    lambda size: client.get(f'/api/recipes/?limit={size}'),
+                    status.HTTP_200_OK,
+                )
+                response = client.get(f'/api/recipes/?limit={LARGE}')
+                for recipe in response.json()['results']:
+                    for field, ids in flags.items():
+                        self.assertEqual(
+                            recipe[field],
+                            user is not None and recipe['id'] in ids,
+                        )
+
+    def test_detail(self):
+        for user in (None, self.viewer):
+            with self.subTest(user=user):
+                client = self.get_client(user)
+                self.assertSameQueryCount(
+                    lambda size: client.get(
+                        f'/api/recipes/{self.recipes[size].id}/'
+                    ),
+                    status.HTTP_200_OK,
+                )
+
+    def test_create(self):
+        client = self.get_client(self.author)
+        self.assertSameQueryCount(
+            lambda size: client.post(
+                '/api/recipes/', self.get_payload(size), format='json'
+            ),
+            status.HTTP_201_CREATED,
+        )
+
+    def test_update(self):
+        client = self.get_client(self.author)
+        self.assertSameQueryCount(
+            lambda size: client.patch(
+                f'/api/recipes/{self.recipes[size].id}/',
+                self.get_payload(size),
+                format='json',
+            ),
+            status.HTTP_200_OK,
+        )
+
+
+@override_settings(CACHES=DUMMY_CACHES)
+class ListQueryCountTests(QueryCountMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create(
+            username='viewer', email='viewer@example.com'
+        )
+        cls.buyer = User.objects.create(
+            username='buyer', email='buyer@example.com'
+        )
+        cls.authors = User.objects.bulk_create(
+            User(
+                username=f'author_{i}',
+                email=f'author_{i}@example.com',
+                first_name='Автор',
+                last_name=str(i),
+            )
+            for i in range(LARGE)
+        )
+        cls.tag = Tag.objects.create(name='Супы', slug='soups')
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(LARGE)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f'Суп {author.username} {i}',
+                text='Суп для проверки числа запросов.',
+                image='recipes/test.gif',
+                cooking_time=10,
+            )
+            for author in cls.authors
+            for i in range(LARGE)
+        )
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag=cls.tag) for recipe in recipes
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in recipes
+            for ingredient in ingredients[:2]
+        )
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create(
+                model(user=cls.viewer, recipe=recipe) for recipe in recipes
+            )
+        ShoppingCart.objects.create(user=cls.buyer, recipe=recipes[0])
+        Subscription.objects.bulk_create(
+            Subscription(user=cls.viewer, author=author)
+            for author in cls.authors
+        )
+        recipes = Recipe.objects.all()
+        update_search_vector(recipes)
+        refresh_cards(recipes)
+        cls.recipe_ids = [recipe.id for recipe in recipes[:LARGE]]
+
+    def get_client(self, user):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def assertListQueryCount(self, template, users):
+        for user in users:
+            with self.subTest(path=template, user=user):
+                client = self.get_client(user)
+                self.assertSameQueryCount(
+                    lambda size: client.get(template.format(
+                        size=size, tag=self.tag.slug, author=self.authors[0].id
+                    )),
+                    status.HTTP_200_OK,
+                )
+
+    def test_recipes(self):
+        for template in (
+            '/api/recipes/?limit={size}',
+            '/api/recipes/?cursor=&limit={size}',
+            '/api/recipes/?tags={tag}&limit={size}',
+            '/api/recipes/?author={author}&limit={size}',
+            '/api/recipes/?search=суп&limit={size}',
+        ):
+            self.assertListQueryCount(template, (None, self.viewer))
+
+    def test_user_recipe_filters(self):
+        for template in (
+            '/api/recipes/?is_favorited=1&limit={size}',
+            '/api/recipes/?is_in_shopping_cart=1&limit={size}',
+        ):
+            self.assertListQueryCount(template, (self.viewer,))
+
+    def test_users(self):
+        self.assertListQueryCount(
+            '/api/users/?limit={size}', (None, self.viewer)
+        )
+
+    def test_ingredients_search(self):
+        self.assertListQueryCount(
+            '/api/ingredients/?name=ингр&limit={size}', (None,)
+        )
+
+    def test_subscriptions(self):
+        for template in (
+            '/api/users/subscriptions/?limit={size}',
+            '/api/users/subscriptions/?limit={size}&recipes_limit={size}',
+            '/api/users/subscriptions/?cursor=&limit={size}',
+        ):
+            self.assertListQueryCount(template, (self.viewer,))
+
+    def test_download_shopping_cart(self):
+        buyers = {SMALL: self.buyer, LARGE: self.viewer}
+        for format in ('txt', 'csv', 'pdf'):
+            with self.subTest(format=format):
+                self.assertSameQueryCount(
+                    lambda size: self.get_client(buyers[size]).get(
+                        '/api/recipes/download_shopping_cart/'
+                        f'?format={format}'
+                    ),
+                    status.HTTP_200_OK,
+                )
+
+    def test_bulk_relations(self):
+        client = self.get_client(self.buyer)
+        for path in ('/api/favorites/bulk/', '/api/shopping_cart/bulk/'):
+            for method in (client.post, client.delete):
+                with self.subTest(path=path, method=method.__name__):
+                    self.assertSameQueryCount(
+                        lambda size: method(
+                            path,
+                            {'ids': self.recipe_ids[:size]},
+                            format='json',
+                        ),
+                        status.HTTP_200_OK,
+                    )
+
+
+@override_settings(CACHES=DUMMY_CACHES)
+class RecipeCursorTests(TestCase):
+
+    def test_cursor_with_search_is_rejected(self):
+        response = self.client.get('/api/recipes/?search=суп&cursor=')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.json())
+
+    def test_cursor_with_empty_search(self):
+        response = self.client.get('/api/recipes/?search=&cursor=')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ShoppingListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='buyer', email='buyer@example.com'
+        )
+        ingredient = Ingredient.objects.create(
+            name='Мука', measurement_unit='г'
+        )
+        for i in range(2):
+            recipe = Recipe.objects.create(
+                author=cls.user, name=f'Рецепт {i}', text='Описание.',
+                image='recipes/test.gif', cooking_time=10,
+            )
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=150
+            )
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self, format):
+        return self.client.get(
+            f'/api/recipes/download_shopping_cart/?format={format}'
+        )
+
+    def test_text_formats_are_streamed(self):
+        for format, line in (('txt', 'Мука - 300 г'), ('csv', 'Мука,300,г')):
+            with self.subTest(format=format):
+                response = self.download(format)
+                self.assertTrue(response.streaming)
+                content = b''.join(response.streaming_content).decode()
+                self.assertIn(line, content)
+
+    def test_pdf_is_buffered(self):
+        response = self.download('pdf')
+        self.assertFalse(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    def test_base_renderer_is_abstract(self):
+        with self.assertRaises(TypeError):
+            ShoppingListRenderer()
+
+
+@override_settings(CACHES=DUMMY_CACHES)
+class ShortLinkTests(TestCase):
+
+    def test_codes_round_trip(self):
+        for pk in (1, 51840, 99999, 100000, 123456, 10 ** 7):
+            with self.subTest(pk=pk):
+                self.assertEqual(decode(encode(pk)), pk)
+
+    def test_numeric_links(self):
+        author = User.objects.create(
+            username='author', email='author@example.com'
+        )
+        for pk in (42, 123456):
+            Recipe.objects.create(
+                id=pk, author=author, name=f'Рецепт {pk}', text='Описание.',
+                image='recipes/test.gif', cooking_time=10,
+            )
+            for code in (str(pk), encode(pk)):
+                with self.subTest(code=code):
+                    response = self.client.get(f'/s/{code}/')
+                    self.assertRedirects(
+                        response, f'/recipes/{pk}/',
+                        fetch_redirect_response=False,
+                    )
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_malformed_codes_are_not_cached(self):
+        for code in ('abc', 'x' * 100, 'abc-de', '007', '9' * 20, '²'):
+            with self.subTest(code=code):
+                response = self.client.get(f'/s/{code}/')
+                self.assertEqual(response.status_code, 404)
+                self.assertIsNone(cache.get(get_cache_key(code)))
+        code = encode(987654)
+        self.assertEqual(self.client.get(f'/s/{code}/').status_code, 404)
+        self.assertEqual(cache.get(get_cache_key(code)), MISSING)
+
+    def test_hits_are_flushed_by_count(self):
+        author = User.objects.create(
+            username='author', email='author@example.com'
+        )
+        recipe = Recipe.objects.create(
+            author=author, name='Рецепт', text='Описание.',
+            image='recipes/test.gif', cooking_time=10,
+        )
+        counter = HitCounter(interval=3600, size=3)
+        for _ in range(2):
+            counter.add(recipe.pk)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.short_link_hits, 0)
+        counter.add(recipe.pk)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.short_link_hits, 3)
+
+
+@override_settings(CACHES=DUMMY_CACHES, METRICS_ENABLED=True)
+class MetricsMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='user', email='user@example.com'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name='Рецепт', text='Описание.',
+            image='recipes/test.gif', cooking_time=10,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_value(self, view, name):
+        return registry.values[('GET', view, 200)][name]
+
+    def test_serialization_is_measured(self):
+        view = 'api:recipes-detail'
+        before = self.get_value(view, 'serialize_duration_seconds_total')
+        response = self.client.get(f'/api/recipes/{self.recipe.id}/')
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+        self.assertGreater(
+            self.get_value(view, 'serialize_duration_seconds_total'), before
+        )
+
+    def test_streaming_queries_are_recorded(self):
+        view = 'api:api.views.download_shopping_cart'
+        names = ('db_queries_total', 'response_bytes_total')
+        before = [self.get_value(view, name) for name in names]
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        content = b''.join(response.streaming_content)
+        self.assertEqual(
+            [self.get_value(view, name) for name in names],
+            [before[0] + 1, before[1] + len(content)],
+        )
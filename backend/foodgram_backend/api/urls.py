@@ -1,9 +1,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import (AvatarView, FavoriteView, IngredientViewSet,
-                       RecipeViewSet, ShoppingCartView, SubscribeView,
-                       TagViewSet, UserViewSet, ViewSubscriptionView,
+from api.views import (AvatarView, FavoriteBulkView, FavoriteView,
+                       IngredientViewSet, RecipeViewSet, ShoppingCartBulkView,
+                       ShoppingCartView, SubscribeView, TagViewSet,
+                       UserViewSet, ViewSubscriptionView,
                        download_shopping_cart)
 
 app_name = 'api'
@@ -18,6 +19,8 @@ urlpatterns = [
     path('recipes/download_shopping_cart/', download_shopping_cart),
     path('recipes/<int:id>/shopping_cart/', ShoppingCartView.as_view()),
     path('recipes/<int:id>/favorite/', FavoriteView.as_view()),
+    path('shopping_cart/bulk/', ShoppingCartBulkView.as_view()),
+    path('favorites/bulk/', FavoriteBulkView.as_view()),
     path(
         'recipes/<int:pk>/get-link/',
         RecipeViewSet.as_view({'get': 'get_link'})
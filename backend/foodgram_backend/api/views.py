@@ -1,51 +1,125 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import Exists, F, OuterRef, Prefetch, Sum, Value, Window
+from django.db.models.functions import RowNumber
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       renderer_classes)
+from rest_framework.exceptions import NotFound
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from rest_framework.views import APIView
 
-from api.filters import IngredientFilter, RecipeFilter
-from api.pagination import CustomPagination
+from api.cache import (RecipeCacheMixin, ReferenceCacheMixin,
+                       get_user_namespace, invalidate)
+from api.cards import render_cards
+from api.filters import RecipeFilter
+from api.metrics import measure
+from api.pagination import RecipePagination, SubscriptionPagination
 from api.permissions import IsAuthorOrAdminOrReadOnly
+from api.renderers import (ShoppingListCSVRenderer, ShoppingListPDFRenderer,
+                           ShoppingListTextRenderer)
+from api.search import get_ingredient_index
 from api.serializers import (AvatarSerializer, CreateRecipeSerializer,
-                             FavoriteSerializer, IngredientSerializer,
-                             RecipeSerializer, ShoppingCartSerializer,
+                             IngredientSerializer, RecipeIdsSerializer,
+                             RecipeSerializer, ShowFavoriteSerializer,
                              SubscriptionSerializer, TagSerializer,
                              UserSerializer, ViewSubscriptionSerializer)
+from api.shortlinks import encode, hit_counter, resolve
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                             ShoppingCart, Tag)
+from recipes.relations import (add_recipe_relation, add_recipe_relations,
+                               remove_recipe_relation, remove_recipe_relations)
 from users.models import Subscription, User
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+def build_recipe_queryset(queryset, user):
+    return annotate_recipe_flags(
+        queryset.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredient_list',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        ),
+        user,
+    )
+
+
+def annotate_recipe_flags(queryset, user):
+    if user.is_anonymous:
+        return queryset
+    return queryset.annotate(
+        is_favorited=Exists(
+            Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+        ),
+        is_in_shopping_cart=Exists(
+            ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+        ),
+    )
+
+
+class TagViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'tags'
     permission_classes = [IsAuthorOrAdminOrReadOnly, ]
     pagination_class = None
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'ingredients'
     permission_classes = [AllowAny, ]
     pagination_class = None
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
-    filter_backends = [IngredientFilter, ]
-    search_fields = ['^name', ]
 
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get('name'):
+            return super().list(request, *args, **kwargs)
+        return self.get_cached_response(self.search, request, *args, **kwargs)
 
-class RecipeViewSet(viewsets.ModelViewSet):
+    def search(self, request, *args, **kwargs):
+        limit = request.query_params.get('limit')
+        limit = int(limit) if limit and limit.isdigit() else None
+        return Response(get_ingredient_index().search(
+            request.query_params['name'], limit
+        ))
+
+
+class RecipeViewSet(RecipeCacheMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthorOrAdminOrReadOnly, ]
-    pagination_class = CustomPagination
-    queryset = Recipe.objects.all().order_by('-pub_date')
+    pagination_class = RecipePagination
+    queryset = Recipe.objects.all().order_by('-pub_date', '-id')
     filter_backends = [DjangoFilterBackend, ]
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        if self.action == 'list':
+            return annotate_recipe_flags(
+                super().get_queryset().only('id', 'pub_date', 'card'),
+                self.request.user,
+            )
+        return build_recipe_queryset(super().get_queryset(), self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            self.list_cards, request, *args, **kwargs
+        )
+
+    def list_cards(self, request, *args, **kwargs):
+        page = self.paginate_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        with measure('serialize'):
+            data = render_cards(page, self.get_serializer_context())
+        return self.get_paginated_response(data)
+
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeSerializer
@@ -59,7 +133,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'], url_path='get-link')
     def get_link(self, request, pk=None):
         recipe = get_object_or_404(Recipe, pk=pk)
-        rev_link = reverse('short_url', args=[recipe.pk])
+        rev_link = reverse('short_url', args=[encode(recipe.pk)])
         return Response({'short-link': request.build_absolute_uri(rev_link)},
                         status=status.HTTP_200_OK)
 
@@ -78,7 +152,6 @@ class AvatarView(APIView):
     def delete(self, request, *args, **kwargs):
         user = request.user
         if user.avatar:
-            user.avatar.delete()
             user.avatar = None
             user.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -86,11 +159,25 @@ class AvatarView(APIView):
 
 class ViewSubscriptionView(APIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = CustomPagination
+    pagination_class = SubscriptionPagination
 
     def get(self, request):
         user = request.user
-        queryset = User.objects.filter(followers__user=user)
+        recipes = Recipe.objects.order_by('-pub_date')
+        limit = request.query_params.get('recipes_limit')
+        if limit is not None and limit.isdigit():
+            recipes = recipes.annotate(
+                row_number=Window(
+                    RowNumber(),
+                    partition_by=F('author'),
+                    order_by=[F('pub_date').desc(), F('id').desc()],
+                )
+            ).filter(row_number__lte=int(limit))
+        queryset = User.objects.filter(followers__user=user).annotate(
+            is_subscribed=Value(True),
+        ).order_by('username').prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='recipes_preview')
+        )
         paginator = self.pagination_class()
 
         page = paginator.paginate_queryset(queryset, request)
@@ -145,95 +232,140 @@ class SubscribeView(APIView):
         )
 
 
-class FavoriteView(APIView):
+class RecipeRelationView(APIView):
     permission_classes = [IsAuthenticated, ]
-    pagination_class = CustomPagination
+    model = None
+    counter = None
 
     def post(self, request, id):
-        recipe = get_object_or_404(Recipe, id=id)
-        data = {
-            'user': request.user.id,
-            'recipe': recipe.id
-        }
-        if not Favorite.objects.filter(
-                user=request.user, recipe__id=id).exists():
-            serializer = FavoriteSerializer(
-                data=data, context={'request': request}
-            )
-            if serializer.is_valid():
-                serializer.save()
-                return Response(
-                    serializer.data, status=status.HTTP_201_CREATED)
-        return Response(status=status.HTTP_400_BAD_REQUEST)
+        recipe = add_recipe_relation(
+            self.model, self.counter, request.user.id, id
+        )
+        if recipe is None:
+            get_object_or_404(Recipe, id=id)
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        invalidate(get_user_namespace(request.user.id))
+        serializer = ShowFavoriteSerializer(
+            recipe, context={'request': request}
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, id):
-        recipe = get_object_or_404(Recipe, id=id)
-        if Favorite.objects.filter(
-                user=request.user, recipe=recipe).exists():
-            Favorite.objects.filter(
-                user=request.user,
-                recipe=recipe
-            ).delete()
+        if remove_recipe_relation(
+                self.model, self.counter, request.user.id, id):
+            invalidate(get_user_namespace(request.user.id))
             return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(Recipe, id=id)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
-class ShoppingCartView(APIView):
+class FavoriteView(RecipeRelationView):
+    model = Favorite
+    counter = 'favorites_count'
+
+
+class ShoppingCartView(RecipeRelationView):
+    model = ShoppingCart
+    counter = 'in_carts_count'
+
+
+class RecipeRelationBulkView(APIView):
     permission_classes = [IsAuthenticated, ]
+    model = None
+    counter = None
 
-    def post(self, request, id):
-        data = {
-            'user': request.user.id,
-            'recipe': id
-        }
-        recipe = get_object_or_404(Recipe, id=id)
-        if not ShoppingCart.objects.filter(
-                user=request.user, recipe=recipe).exists():
-            serializer = ShoppingCartSerializer(
-                data=data, context={'request': request}
+    def get_ids(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        existing = set(
+            Recipe.objects.filter(id__in=ids).values_list('id', flat=True)
+        )
+        return ids, existing
+
+    def get_response(self, ids, existing, changed, changed_status,
+                     unchanged_status):
+        if changed:
+            invalidate(get_user_namespace(self.request.user.id))
+        results = []
+        for id in ids:
+            if id not in existing:
+                result = 'not_found'
+            elif id in changed:
+                result = changed_status
+            else:
+                result = unchanged_status
+            results.append({'id': id, 'status': result})
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        ids, existing = self.get_ids(request)
+        added = {
+            recipe.id for recipe in add_recipe_relations(
+                self.model, self.counter, request.user.id, existing
             )
-            if serializer.is_valid():
-                serializer.save()
-                return Response(
-                    serializer.data, status=status.HTTP_201_CREATED)
-        return Response(status=status.HTTP_400_BAD_REQUEST)
+        }
+        return self.get_response(ids, existing, added, 'added', 'exists')
+
+    def delete(self, request):
+        ids, existing = self.get_ids(request)
+        removed = remove_recipe_relations(
+            self.model, self.counter, request.user.id, existing
+        )
+        return self.get_response(
+            ids, existing, removed, 'removed', 'absent'
+        )
 
-    def delete(self, request, id):
-        recipe = get_object_or_404(Recipe, id=id)
-        if ShoppingCart.objects.filter(
-                user=request.user, recipe=recipe).exists():
-            ShoppingCart.objects.filter(
-                user=request.user, recipe=recipe
-            ).delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        return Response(status=status.HTTP_400_BAD_REQUEST)
+
+class FavoriteBulkView(RecipeRelationBulkView):
+    model = Favorite
+    counter = 'favorites_count'
+
+
+class ShoppingCartBulkView(RecipeRelationBulkView):
+    model = ShoppingCart
+    counter = 'in_carts_count'
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def short_url(request, pk):
-    recipe = get_object_or_404(Recipe, pk=pk)
-    return redirect(f'/recipes/{recipe.pk}/')
+def short_url(request, code):
+    pk = resolve(code)
+    if not pk:
+        raise NotFound('Рецепт не найден.')
+    hit_counter.add(pk)
+    return redirect(f'/recipes/{pk}/')
 
 
 @api_view(['GET'])
+@renderer_classes([
+    ShoppingListTextRenderer,
+    ShoppingListCSVRenderer,
+    ShoppingListPDFRenderer,
+])
 def download_shopping_cart(request):
-    ingredient_list = "Cписок покупок:"
     ingredients = RecipeIngredient.objects.filter(
         recipe__shopping_cart__user=request.user
     ).values(
-        'ingredient__name', 'ingredient__measurement_unit'
-    ).annotate(amount=Sum('amount'))
-    for num, i in enumerate(ingredients):
-        ingredient_list += (
-            f"\n{i['ingredient__name']} - "
-            f"{i['amount']} {i['ingredient__measurement_unit']}"
+        name=F('ingredient__name'),
+        measurement_unit=F('ingredient__measurement_unit'),
+    ).annotate(amount=Sum('amount')).order_by('name')
+    renderer = request.accepted_renderer
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type = f'{content_type}; charset={renderer.charset}'
+    if renderer.streaming:
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients.iterator()),
+            content_type=content_type,
+        )
+    else:
+        response = HttpResponse(
+            renderer.render(ingredients.iterator()),
+            content_type=content_type,
         )
-        if num < ingredients.count() - 1:
-            ingredient_list += ', '
-    file = 'shopping_list'
-    response = HttpResponse(ingredient_list, 'Content-Type: application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{file}.pdf"'
+    file = f'shopping_list.{renderer.format}'
+    response['Content-Disposition'] = f'attachment; filename="{file}"'
     return response
 
 
@@ -7,3 +7,16 @@ INGREDIENT_LENGTH_LIMIT = 128
 UNIT_LENGTH_LIMIT = 64
 INGREDIENT_AMOUNT_MIN = 1
 COOKING_TIME_MIN = 1
+SEARCH_CONFIG = 'russian'
+BULK_RECIPES_LIMIT = 100
+IMAGE_VARIANT_SIZES = {'thumbnail': 160, 'card': 480, 'full': 1280}
+IMAGE_VARIANT_QUALITY = 80
+SHORT_LINK_LENGTH = 6
+SHORT_LINK_MULTIPLIER = 1580030173
+SHORT_LINK_LOCAL_CACHE_SIZE = 4096
+SHORT_LINK_LOCAL_TIMEOUT = 30
+SHORT_LINK_NEGATIVE_TIMEOUT = 60
+SHORT_LINK_FLUSH_INTERVAL = 30
+SHORT_LINK_FLUSH_SIZE = 500
+METRICS_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+RECIPE_CARD_BATCH_SIZE = 500
@@ -0,0 +1,35 @@
+import os
+
+import hashlib
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файлы под именем SHA-256 их содержимого.
+
+    Одинаковые загрузки записываются один раз, а имя файла никогда не
+    указывает на другое содержимое, поэтому его можно кешировать навсегда.
+    Удалять файлы нужно командой collect_media_garbage, а не напрямую:
+    на один файл могут ссылаться несколько записей. При повторной загрузке
+    время изменения файла обновляется, чтобы сборщик его не удалил.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        name = posixpath.join(directory, f'{digest.hexdigest()}{extension}')
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
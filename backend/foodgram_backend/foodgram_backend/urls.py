@@ -1,10 +1,12 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from api.metrics import metrics
 from api.views import short_url
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
-    path('s/<int:pk>/', short_url, name='short_url')
+    path('s/<str:code>/', short_url, name='short_url'),
+    path('metrics/', metrics, name='metrics'),
 ]
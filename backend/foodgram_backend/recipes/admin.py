@@ -31,6 +31,9 @@ class RecipeAdmin(admin.ModelAdmin):
         'name',
         'text',
         'author',
+        'favorites_count',
+        'in_carts_count',
+        'short_link_hits',
     ]
     search_fields = [
         'name',
@@ -0,0 +1,50 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+RECIPE_COUNTERS = {
+    'favorites_count': 'favorites',
+    'in_carts_count': 'shopping_cart',
+}
+USER_COUNTERS = {
+    'recipes_count': 'recipes',
+}
+
+
+def count_subquery(model, related_name):
+    relation = model._meta.get_field(related_name)
+    field_name = relation.field.name
+    return Coalesce(
+        Subquery(
+            relation.related_model.objects.filter(
+                **{field_name: OuterRef('pk')}
+            ).order_by().values(field_name).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        0,
+    )
+
+
+def counter_expressions(model, counters):
+    return {
+        field: count_subquery(model, related_name)
+        for field, related_name in counters.items()
+    }
+
+
+class CounterFieldsMixin:
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not args
+            and not self._state.adding
+            and not kwargs.get('force_insert')
+            and kwargs.get('update_fields') is None
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
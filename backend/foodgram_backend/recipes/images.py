@@ -0,0 +1,114 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from foodgram_backend.constants import (IMAGE_VARIANT_QUALITY,
+                                        IMAGE_VARIANT_SIZES)
+from PIL import Image, ImageOps
+
+from api.cache import invalidate
+from api.cards import clear_cards_for
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+IMAGE_FIELDS = (
+    ('recipes.Recipe', 'image', 'image_variants'),
+    ('users.User', 'avatar', 'avatar_variants'),
+)
+
+executor = None
+
+
+def get_executor():
+    global executor
+    if executor is None:
+        executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_PROCESSING_WORKERS,
+            thread_name_prefix='image-variants',
+        )
+    return executor
+
+
+def save_variant(image, directory, extension):
+    buffer = BytesIO()
+    image.save(
+        buffer, IMAGE_FORMATS[extension],
+        quality=IMAGE_VARIANT_QUALITY, optimize=True,
+    )
+    return default_storage.save(
+        posixpath.join(directory, 'variants', f'variant.{extension}'),
+        ContentFile(buffer.getvalue()),
+    )
+
+
+def render_variants(name):
+    with default_storage.open(name, 'rb') as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original = original.convert('RGB')
+    directory = posixpath.dirname(name)
+    variants = {'source': name}
+    for variant, size in IMAGE_VARIANT_SIZES.items():
+        image = original.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+        variants[variant] = {
+            extension: save_variant(image, directory, extension)
+            for extension in IMAGE_FORMATS
+        }
+    return variants
+
+
+def process_image(model, pk, field, variants_field):
+    close_old_connections()
+    try:
+        name = model.objects.filter(pk=pk).values_list(
+            field, flat=True
+        ).first()
+        if not name:
+            return
+        variants = render_variants(name)
+        if model.objects.filter(pk=pk, **{field: name}).update(
+            **{variants_field: variants}
+        ):
+            clear_cards_for(model, pk)
+            invalidate('recipes')
+    except Exception:
+        logger.exception(
+            'Не удалось обработать изображение %s #%s', model.__name__, pk
+        )
+    finally:
+        close_old_connections()
+
+
+def get_image_fields():
+    return [
+        (apps.get_model(model), field, variants_field)
+        for model, field, variants_field in IMAGE_FIELDS
+    ]
+
+
+def variants_outdated(instance, field, variants_field):
+    name = getattr(instance, field).name or None
+    return getattr(instance, variants_field).get('source') != name
+
+
+def schedule_image_variants(instance, field, variants_field):
+    if not getattr(instance, field):
+        type(instance).objects.filter(pk=instance.pk).update(
+            **{variants_field: {}}
+        )
+        return
+    args = (type(instance), instance.pk, field, variants_field)
+    if settings.IMAGE_PROCESSING_ASYNC:
+        transaction.on_commit(lambda: get_executor().submit(
+            process_image, *args
+        ))
+    else:
+        transaction.on_commit(lambda: process_image(*args))
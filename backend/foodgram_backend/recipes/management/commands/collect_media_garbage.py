@@ -0,0 +1,93 @@
+import posixpath
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import FileField
+from django.utils import timezone
+
+from recipes.images import get_image_fields
+
+
+def walk(directory):
+    directories, files = default_storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for name in directories:
+        yield from walk(posixpath.join(directory, name))
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает ссылки на медиафайлы и удаляет файлы, '
+        'на которые не ссылается ни одна запись.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=60,
+            help='Не трогать файлы моложе указанного числа минут.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.',
+        )
+
+    def collect_references(self):
+        references = Counter()
+        directories = set()
+        for model in apps.get_models():
+            for field in model._meta.get_fields():
+                if not isinstance(field, FileField):
+                    continue
+                if isinstance(field.upload_to, str):
+                    directories.add(field.upload_to.rstrip('/'))
+                references.update(
+                    model.objects.exclude(**{field.name: ''}).exclude(
+                        **{f'{field.name}__isnull': True}
+                    ).values_list(field.name, flat=True).iterator()
+                )
+        for model, _, variants_field in get_image_fields():
+            for variants in model.objects.values_list(
+                variants_field, flat=True
+            ).iterator():
+                for variant, files in variants.items():
+                    if variant != 'source':
+                        references.update(files.values())
+        return references, directories
+
+    def handle(self, *args, **options):
+        references, directories = self.collect_references()
+        deadline = timezone.now() - timedelta(minutes=options['grace'])
+        scanned = orphans = freed = shared = saved = 0
+        for directory in sorted(directories):
+            if not default_storage.exists(directory):
+                continue
+            for name in walk(directory):
+                scanned += 1
+                size = default_storage.size(name)
+                if references[name] > 1:
+                    shared += 1
+                    saved += size * (references[name] - 1)
+                if (
+                    references[name]
+                    or default_storage.get_modified_time(name) > deadline
+                ):
+                    continue
+                orphans += 1
+                freed += size
+                if options['dry_run']:
+                    self.stdout.write(f'  {name}')
+                else:
+                    default_storage.delete(name)
+        self.stdout.write(
+            f'Файлов: {scanned}, общих: {shared} '
+            f'(сэкономлено {saved / 2 ** 20:.1f} МБ), '
+            f'без ссылок: {orphans} ({freed / 2 ** 20:.1f} МБ)'
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Пробный запуск.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Готово.'))
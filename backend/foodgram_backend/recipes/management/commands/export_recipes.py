@@ -0,0 +1,92 @@
+import sys
+
+import base64
+import json
+import mimetypes
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from recipes.models import Recipe, RecipeIngredient
+
+
+class Command(BaseCommand):
+    help = 'Выгружает рецепты в формате JSON Lines (по рецепту на строку).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки, по умолчанию stdout.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--with-images', action='store_true',
+            help='Встраивать изображения как data URI в base64.',
+        )
+
+    def serialize_image(self, image, with_images):
+        if not image:
+            return None
+        if not with_images:
+            return image.name
+        content_type = mimetypes.guess_type(image.name)[0] or 'image/jpeg'
+        with image.open('rb') as file:
+            encoded = base64.b64encode(file.read()).decode()
+        return f'data:{content_type};base64,{encoded}'
+
+    def serialize(self, recipe, with_images):
+        return {
+            'name': recipe.name,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'author': recipe.author.email,
+            'pub_date': recipe.pub_date.isoformat(),
+            'image': self.serialize_image(recipe.image, with_images),
+            'tags': [tag.slug for tag in recipe.tags.all()],
+            'ingredients': [
+                {
+                    'name': item.ingredient.name,
+                    'measurement_unit': item.ingredient.measurement_unit,
+                    'amount': item.amount,
+                }
+                for item in recipe.ingredient_list.all()
+            ],
+        }
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredient_list',
+                queryset=RecipeIngredient.objects.select_related('ingredient'),
+            ),
+        ).order_by('id').iterator(chunk_size=options['chunk_size'])
+        output = (
+            sys.stdout if options['path'] == '-'
+            else open(options['path'], 'w', encoding='utf-8')
+        )
+        start = time.perf_counter()
+        exported = 0
+        try:
+            for recipe in recipes:
+                output.write(json.dumps(
+                    self.serialize(recipe, options['with_images']),
+                    ensure_ascii=False,
+                ))
+                output.write('\n')
+                exported += 1
+                if exported % options['chunk_size'] == 0:
+                    self.report(exported, start)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        self.report(exported, start)
+
+    def report(self, exported, start):
+        elapsed = time.perf_counter() - start
+        self.stderr.write(
+            f'Выгружено {exported} рецептов за {elapsed:.1f} с '
+            f'({exported / max(elapsed, 1e-9):.0f} рец/с)',
+            style_func=self.style.HTTP_INFO,
+        )
@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.cache import SharedCacheCommandMixin
+from recipes.images import get_image_fields, process_image, variants_outdated
+
+
+class Command(SharedCacheCommandMixin, BaseCommand):
+    help = (
+        'Генерирует уменьшенные копии изображений рецептов и аватаров, '
+        'для которых они ещё не созданы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int,
+            default=settings.IMAGE_PROCESSING_WORKERS,
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать копии для всех изображений.',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['workers']) as pool:
+            for model, field, variants_field in get_image_fields():
+                pks = [
+                    instance.pk
+                    for instance in model.objects.exclude(
+                        **{field: ''}
+                    ).exclude(
+                        **{f'{field}__isnull': True}
+                    ).only('pk', field, variants_field).iterator()
+                    if options['force']
+                    or variants_outdated(instance, field, variants_field)
+                ]
+                list(pool.map(
+                    lambda pk: process_image(
+                        model, pk, field, variants_field
+                    ),
+                    pks,
+                ))
+                self.stdout.write(
+                    f'{model._meta.verbose_name_plural}: {len(pks)}'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - start:.1f} с.'
+        ))
@@ -0,0 +1,230 @@
+import sys
+
+import base64
+import binascii
+import json
+import mimetypes
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.cache import SharedCacheCommandMixin, invalidate
+from api.cards import refresh_cards
+from recipes.counters import USER_COUNTERS, counter_expressions
+from recipes.models import Ingredient, Recipe, RecipeIngredient, RecipeTag, Tag
+from recipes.search import update_search_vector
+from users.models import User
+
+RECIPE_IMAGE_DIR = Recipe._meta.get_field('image').upload_to
+
+
+def store_image(value):
+    if not value or not value.startswith('data:'):
+        return value
+    header, encoded = value.split(';base64,', 1)
+    extension = mimetypes.guess_extension(header[len('data:'):]) or '.jpg'
+    return default_storage.save(
+        f'{RECIPE_IMAGE_DIR}{uuid.uuid4()}{extension}',
+        ContentFile(base64.b64decode(encoded)),
+    )
+
+
+def parse_pub_date(value):
+    if value is None:
+        return None
+    try:
+        pub_date = parse_datetime(value)
+    except (TypeError, ValueError):
+        pub_date = None
+    if pub_date is None:
+        raise CommandError(f'Некорректная дата публикации: {value!r}')
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date
+
+
+class Command(SharedCacheCommandMixin, BaseCommand):
+    help = (
+        'Загружает рецепты из JSON Lines пачками через bulk_create; '
+        'изображения декодируются параллельно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл JSON Lines, по умолчанию stdin.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--default-author',
+            help='Email автора для рецептов, чей автор не найден.',
+        )
+
+    def load_maps(self):
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = {
+            (name, unit): id
+            for id, name, unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        }
+
+    def resolve_authors(self, rows, default_author):
+        emails = {row['author'] for row in rows}
+        authors = dict(
+            User.objects.filter(email__in=emails).values_list('email', 'id')
+        )
+        missing = emails - set(authors)
+        if missing and default_author is None:
+            raise CommandError(
+                f'Авторы не найдены: {", ".join(sorted(missing))}. '
+                'Укажите --default-author.'
+            )
+        return {
+            email: authors.get(email, default_author) for email in emails
+        }
+
+    def resolve_ingredients(self, rows):
+        missing = {
+            (item['name'], item['measurement_unit'])
+            for row in rows
+            for item in row['ingredients']
+        } - set(self.ingredients)
+        if not missing:
+            return
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(name=name, measurement_unit=unit)
+                for name, unit in missing
+            ],
+            ignore_conflicts=True,
+        )
+        names = {name for name, _ in missing}
+        self.ingredients.update({
+            (name, unit): id
+            for id, name, unit in Ingredient.objects.filter(
+                name__in=names
+            ).values_list('id', 'name', 'measurement_unit')
+        })
+        unresolved = missing - set(self.ingredients)
+        if unresolved:
+            raise CommandError(
+                'Ингредиенты конфликтуют со справочником: '
+                + ', '.join(f'{name} ({unit})' for name, unit in unresolved)
+            )
+
+    @transaction.atomic
+    def import_chunk(self, rows, images, default_author):
+        authors = self.resolve_authors(rows, default_author)
+        self.resolve_ingredients(rows)
+        unknown_tags = {
+            slug for row in rows for slug in row['tags']
+        } - set(self.tags)
+        if unknown_tags:
+            raise CommandError(
+                f'Теги не найдены: {", ".join(sorted(unknown_tags))}'
+            )
+        pub_dates = [parse_pub_date(row.get('pub_date')) for row in rows]
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author_id=authors[row['author']],
+                name=row['name'],
+                text=row['text'],
+                cooking_time=row['cooking_time'],
+                image=image,
+            )
+            for row, image in zip(rows, images)
+        )
+        dated = []
+        for recipe, pub_date in zip(recipes, pub_dates):
+            if pub_date is not None:
+                recipe.pub_date = pub_date
+                dated.append(recipe)
+        Recipe.objects.bulk_update(dated, ['pub_date'])
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag_id=self.tags[slug])
+            for recipe, row in zip(recipes, rows)
+            for slug in row['tags']
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=self.ingredients[
+                    (item['name'], item['measurement_unit'])
+                ],
+                amount=item['amount'],
+            )
+            for recipe, row in zip(recipes, rows)
+            for item in row['ingredients']
+        )
+        imported = Recipe.objects.filter(
+            id__in=[recipe.id for recipe in recipes]
+        )
+        update_search_vector(imported)
+        refresh_cards(imported)
+        User.objects.filter(id__in=set(authors.values())).update(
+            **counter_expressions(User, USER_COUNTERS)
+        )
+
+    def read_rows(self, lines):
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise CommandError(f'Строка {number}: {error}')
+
+    def handle(self, *args, **options):
+        default_author = None
+        if options['default_author']:
+            default_author = User.objects.filter(
+                email=options['default_author']
+            ).values_list('id', flat=True).first()
+            if default_author is None:
+                raise CommandError('Автор по умолчанию не найден.')
+        self.load_maps()
+        lines = (
+            sys.stdin if options['path'] == '-'
+            else open(options['path'], encoding='utf-8')
+        )
+        rows = self.read_rows(lines)
+        start = time.perf_counter()
+        imported = 0
+        try:
+            with ThreadPoolExecutor(options['workers']) as pool:
+                while True:
+                    chunk = list(islice(rows, options['chunk_size']))
+                    if not chunk:
+                        break
+                    try:
+                        images = list(pool.map(
+                            store_image,
+                            (row.get('image') for row in chunk),
+                        ))
+                    except (binascii.Error, ValueError) as error:
+                        raise CommandError(f'Ошибка изображения: {error}')
+                    self.import_chunk(chunk, images, default_author)
+                    imported += len(chunk)
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f'Загружено {imported} рецептов за {elapsed:.1f} с '
+                        f'({imported / max(elapsed, 1e-9):.0f} рец/с)'
+                    )
+        finally:
+            if lines is not sys.stdin:
+                lines.close()
+        if imported:
+            invalidate('recipes')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {imported} рецептов.'
+        ))
@@ -0,0 +1,129 @@
+import csv
+import json
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import SharedCacheCommandMixin, invalidate
+from api.cards import clear_cards
+from recipes.models import Ingredient, Recipe
+
+
+def read_csv(file):
+    for number, row in enumerate(csv.reader(file), 1):
+        if not row:
+            continue
+        if len(row) != 2:
+            raise CommandError(f'Строка {number}: ожидалось два столбца.')
+        yield row
+
+
+def read_json(file):
+    for item in json.load(file):
+        yield item['name'], item['measurement_unit']
+
+
+class Command(SharedCacheCommandMixin, BaseCommand):
+    help = (
+        'Загружает справочник ингредиентов из CSV или JSON пачками '
+        'через upsert; повторный запуск применяет только изменения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default=settings.INGREDIENTS_PATH,
+            help='По умолчанию берётся из настройки INGREDIENTS_PATH.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать изменения, ничего не записывая.',
+        )
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Удалить ингредиенты, которых нет в файле '
+                 'и которые не используются в рецептах.',
+        )
+        parser.add_argument(
+            '--verbose-diff', action='store_true',
+            help='Вывести каждое изменение построчно.',
+        )
+
+    def read(self, path):
+        reader = read_json if path.endswith('.json') else read_csv
+        try:
+            with open(path, encoding='utf-8') as file:
+                return {
+                    name.strip(): unit.strip()
+                    for name, unit in reader(file)
+                }
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть файл: {error}')
+
+    def upsert(self, rows, batch_size):
+        rows = iter(rows.items())
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            Ingredient.objects.bulk_create(
+                [
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in batch
+                ],
+                update_conflicts=True,
+                unique_fields=['name'],
+                update_fields=['measurement_unit'],
+            )
+
+    def report(self, title, items, verbose):
+        self.stdout.write(f'{title}: {len(items)}')
+        if verbose:
+            for name, unit in sorted(items.items()):
+                self.stdout.write(f'  {name} ({unit})')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rows = self.read(options['path'])
+        existing = dict(Ingredient.objects.values_list(
+            'name', 'measurement_unit'
+        ))
+        added = {
+            name: unit for name, unit in rows.items() if name not in existing
+        }
+        changed = {
+            name: unit for name, unit in rows.items()
+            if name in existing and existing[name] != unit
+        }
+        missing = {
+            name: unit for name, unit in existing.items() if name not in rows
+        }
+        verbose = options['verbose_diff']
+        self.report('Новых', added, verbose)
+        self.report('Изменена единица измерения', changed, verbose)
+        self.report('Отсутствуют в файле', missing, verbose)
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Пробный запуск.'))
+            return
+        pruned = 0
+        with transaction.atomic():
+            self.upsert({**added, **changed}, options['batch_size'])
+            if changed:
+                clear_cards(Recipe.objects.filter(
+                    ingredients__name__in=changed
+                ))
+            if options['prune'] and missing:
+                pruned, _ = Ingredient.objects.filter(
+                    name__in=missing, ingredient_recipe__isnull=True
+                ).delete()
+        if added or changed or pruned:
+            invalidate('ingredients')
+        if changed:
+            invalidate('recipes')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {len(rows)} строк, записано {len(added) + len(changed)},'
+            f' удалено {pruned} за {time.perf_counter() - start:.2f} с.'
+        ))
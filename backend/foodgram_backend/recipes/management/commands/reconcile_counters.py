@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import (RECIPE_COUNTERS, USER_COUNTERS,
+                              counter_expressions)
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованные счётчики рецептов и авторов '
+        'пачками и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def reconcile(self, model, counters, batch_size, dry_run):
+        fields = list(counters)
+        queryset = model.objects.only('pk', *fields).annotate(**{
+            f'actual_{field}': expression
+            for field, expression in counter_expressions(
+                model, counters
+            ).items()
+        }).order_by('pk')
+        last_pk = None
+        checked = fixed = 0
+        while True:
+            batch = queryset
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            changed = []
+            for instance in batch:
+                drift = False
+                for field in fields:
+                    actual = getattr(instance, f'actual_{field}')
+                    if getattr(instance, field) != actual:
+                        setattr(instance, field, actual)
+                        drift = True
+                if drift:
+                    changed.append(instance)
+            if changed and not dry_run:
+                model.objects.bulk_update(changed, fields)
+            checked += len(batch)
+            fixed += len(changed)
+            last_pk = batch[-1].pk
+        self.stdout.write(
+            f'{model._meta.label}: проверено {checked}, '
+            f'расхождений {fixed}'
+        )
+
+    def handle(self, *args, **options):
+        for model, counters in (
+            (Recipe, RECIPE_COUNTERS),
+            (User, USER_COUNTERS),
+        ):
+            self.reconcile(
+                model, counters, options['batch_size'], options['dry_run']
+            )
@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.db.models import UniqueConstraint
@@ -8,6 +10,7 @@ from foodgram_backend.constants import (COOKING_TIME_MIN,
                                         RECIPE_LENGTH_LIMIT, TAG_LENGTH_LIMIT,
                                         UNIT_LENGTH_LIMIT)
 
+from recipes.counters import RECIPE_COUNTERS, CounterFieldsMixin
 from users.models import User
 
 
@@ -47,7 +50,7 @@ class Tag(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -60,6 +63,11 @@ class Recipe(models.Model):
         blank=False,
         upload_to='media/recipes/',
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField()
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -86,6 +94,40 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True,
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+    short_link_hits = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+    )
+    card = models.JSONField(
+        null=True,
+        editable=False,
+    )
+
+    counter_fields = (*RECIPE_COUNTERS, 'short_link_hits')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx',
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx',
+            ),
+        ]
 
 
 class RecipeIngredient(models.Model):
@@ -129,6 +171,12 @@ class RecipeTag(models.Model):
 
     class Meta:
         ordering = ['-id']
+        indexes = [
+            models.Index(
+                fields=['recipe', 'tag'],
+                name='recipe_tag_recipe_tag_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.recipe} имеет тег {self.tag}'
@@ -0,0 +1,78 @@
+from django.db import connection
+
+from recipes.models import Recipe
+
+ADD_RELATION_SQL = '''
+WITH inserted AS (
+    INSERT INTO {relation} (user_id, recipe_id)
+    SELECT %s, id FROM {recipe} WHERE id = ANY(%s)
+    ON CONFLICT DO NOTHING
+    RETURNING recipe_id
+)
+UPDATE {recipe} SET {counter} = {counter} + 1
+FROM inserted WHERE {recipe}.id = inserted.recipe_id
+RETURNING {recipe}.id, {recipe}.name, {recipe}.image,
+    {recipe}.image_variants, {recipe}.cooking_time
+'''
+
+REMOVE_RELATION_SQL = '''
+WITH deleted AS (
+    DELETE FROM {relation}
+    WHERE user_id = %s AND recipe_id = ANY(%s)
+    RETURNING recipe_id
+)
+UPDATE {recipe} SET {counter} = GREATEST({counter} - 1, 0)
+FROM deleted WHERE {recipe}.id = deleted.recipe_id
+RETURNING {recipe}.id
+'''
+
+
+def format_sql(sql, model, counter):
+    quote = connection.ops.quote_name
+    return sql.format(
+        relation=quote(model._meta.db_table),
+        recipe=quote(Recipe._meta.db_table),
+        counter=quote(counter),
+    )
+
+
+def add_recipe_relations(model, counter, user_id, recipe_ids):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            format_sql(ADD_RELATION_SQL, model, counter),
+            [user_id, list(recipe_ids)],
+        )
+        variants_field = Recipe._meta.get_field('image_variants')
+        return [
+            Recipe(
+                id=id,
+                name=name,
+                image=image,
+                image_variants=variants_field.from_db_value(
+                    image_variants, None, connection
+                ),
+                cooking_time=cooking_time,
+            )
+            for id, name, image, image_variants, cooking_time
+            in cursor.fetchall()
+        ]
+
+
+def remove_recipe_relations(model, counter, user_id, recipe_ids):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            format_sql(REMOVE_RELATION_SQL, model, counter),
+            [user_id, list(recipe_ids)],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def add_recipe_relation(model, counter, user_id, recipe_id):
+    recipes = add_recipe_relations(model, counter, user_id, [recipe_id])
+    return recipes[0] if recipes else None
+
+
+def remove_recipe_relation(model, counter, user_id, recipe_id):
+    return bool(
+        remove_recipe_relations(model, counter, user_id, [recipe_id])
+    )
@@ -0,0 +1,32 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import connection
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+from foodgram_backend.constants import SEARCH_CONFIG
+
+
+def update_search_vector(queryset):
+    if connection.vendor != 'postgresql':
+        return
+    recipe_ingredient = queryset.model._meta.get_field(
+        'ingredient_list'
+    ).related_model
+    ingredient_names = recipe_ingredient.objects.filter(
+        recipe=OuterRef('pk')
+    ).order_by().values('recipe').annotate(
+        names=StringAgg('ingredient__name', ' ')
+    ).values('names')
+    queryset.update(search_vector=(
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(
+            Coalesce(
+                Subquery(ingredient_names),
+                Value(''),
+                output_field=TextField(),
+            ),
+            weight='C',
+            config=SEARCH_CONFIG,
+        )
+    ))
@@ -0,0 +1,76 @@
+import threading
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.images import schedule_image_variants, variants_outdated
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from recipes.search import update_search_vector
+from users.models import User
+
+pending = threading.local()
+
+
+def flush_search_vector_updates():
+    recipe_ids = getattr(pending, 'recipe_ids', None)
+    if not recipe_ids:
+        return
+    pending.recipe_ids = set()
+    update_search_vector(Recipe.objects.filter(pk__in=recipe_ids))
+
+
+def schedule_search_vector_update(recipe_ids):
+    if not hasattr(pending, 'recipe_ids'):
+        pending.recipe_ids = set()
+    pending.recipe_ids.update(recipe_ids)
+    transaction.on_commit(flush_search_vector_updates)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, **kwargs):
+    schedule_search_vector_update([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    schedule_search_vector_update([instance.recipe_id])
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(sender, instance, created, **kwargs):
+    if not created:
+        schedule_search_vector_update(
+            RecipeIngredient.objects.filter(
+                ingredient=instance
+            ).values_list('recipe_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    if variants_outdated(instance, 'image', 'image_variants'):
+        schedule_image_variants(instance, 'image', 'image_variants')
+
+
+@receiver(post_save, sender=User)
+def avatar_saved(sender, instance, **kwargs):
+    if variants_outdated(instance, 'avatar', 'avatar_variants'):
+        schedule_image_variants(instance, 'avatar', 'avatar_variants')
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        User.objects.filter(id=instance.author_id).update(
+            recipes_count=F('recipes_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    User.objects.filter(id=instance.author_id).update(
+        recipes_count=Greatest(F('recipes_count') - 1, 0)
+    )
@@ -0,0 +1,100 @@
+import os
+
+import tempfile
+from datetime import datetime, timezone
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from io import StringIO
+
+from recipes.models import Recipe
+from users.models import User
+
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+}
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+}
+
+
+class CounterFieldsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@example.com'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Описание.',
+            image='recipes/test.gif', cooking_time=10,
+        )
+
+    def test_save_keeps_recipe_counters(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        Recipe.objects.filter(pk=recipe.pk).update(
+            favorites_count=3, in_carts_count=2, short_link_hits=7
+        )
+        recipe.name = 'Новое название'
+        recipe.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(
+            (
+                recipe.favorites_count,
+                recipe.in_carts_count,
+                recipe.short_link_hits,
+            ),
+            (3, 2, 7),
+        )
+
+    def test_save_keeps_user_counters(self):
+        user = User.objects.get(pk=self.author.pk)
+        User.objects.filter(pk=user.pk).update(recipes_count=5)
+        user.first_name = 'Автор'
+        user.save()
+        user.refresh_from_db()
+        self.assertEqual(user.first_name, 'Автор')
+        self.assertEqual(user.recipes_count, 5)
+
+
+@override_settings(CACHES=DUMMY_CACHES)
+class RecipeTransferTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@example.com'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Описание.',
+            image='recipes/test.gif', cooking_time=10,
+        )
+        cls.pub_date = datetime(2020, 5, 17, 12, 30, tzinfo=timezone.utc)
+        Recipe.objects.filter(pk=cls.recipe.pk).update(pub_date=cls.pub_date)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'recipes.jsonl')
+        call_command('export_recipes', self.path, stderr=StringIO())
+
+    def import_recipes(self, **options):
+        call_command('import_recipes', self.path, stdout=StringIO(), **options)
+        return Recipe.objects.exclude(pk=self.recipe.pk)
+
+    def test_import_restores_pub_date(self):
+        imported = self.import_recipes().get()
+        self.assertEqual(imported.name, self.recipe.name)
+        self.assertEqual(imported.pub_date, self.pub_date)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_import_rejects_local_cache(self):
+        with self.assertRaisesMessage(CommandError, 'LocMemCache'):
+            self.import_recipes()
+        self.assertFalse(Recipe.objects.exclude(pk=self.recipe.pk).exists())
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_import_allows_local_cache_explicitly(self):
+        self.assertEqual(
+            self.import_recipes(allow_local_cache=True).count(), 1
+        )
@@ -11,6 +11,7 @@ class UserAdmin(BaseUserAdmin):
         'email',
         'first_name',
         'last_name',
+        'recipes_count',
         'is_active',
         'is_staff',
     ]
@@ -4,8 +4,10 @@ from django.db import models
 from django.db.models import UniqueConstraint
 from foodgram_backend.constants import EMAIL_LENGTH_LIMIT, USER_LENGTH_LIMIT
 
+from recipes.counters import USER_COUNTERS, CounterFieldsMixin
 
-class User(AbstractUser):
+
+class User(CounterFieldsMixin, AbstractUser):
     email = models.EmailField(
         max_length=EMAIL_LENGTH_LIMIT,
         unique=True,
@@ -32,7 +34,17 @@ class User(AbstractUser):
         null=True,
         upload_to='media/avatars',
     )
+    avatar_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
 
+    counter_fields = tuple(USER_COUNTERS)
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 